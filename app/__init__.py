@@ -2,6 +2,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+import multiprocessing
 import os
 from urllib.parse import quote_plus
 
@@ -32,6 +33,74 @@ def get_database_uri():
     print(f"🐳 Conectando a MySQL local: {host}:{port}/{database}")
     return uri
 
+def _tareas_de_arranque(app):
+    """
+    Tareas que deben ejecutarse una sola vez por proceso del servidor:
+    creación y actualización del esquema, backfills, carga del índice de
+    códigos e inicio de los hilos de estadísticas y snapshots.
+    """
+    # Crear tablas en caso de que no existan
+    try:
+        db.create_all()
+        print("✅ Tablas de base de datos creadas/verificadas correctamente")
+    except Exception as e:
+        print(f"❌ Error al crear tablas: {e}")
+
+    # Columnas e índices agregados después de la creación inicial de las tablas
+    try:
+        from app.utils.db_schema import ensure_columns, ensure_indexes, ensure_not_null
+        from app.models.product_model import Product, InventoryMovement
+        from app.models.inventario_model import Producto, MovimientoInventario, SaldoValorizado
+        ensure_columns(InventoryMovement, Producto, MovimientoInventario, SaldoValorizado)
+        ensure_not_null(Producto, 'cantidad', 'estado')
+        ensure_indexes(Product, InventoryMovement, Producto, MovimientoInventario)
+        print("✅ Columnas e índices de base de datos verificados")
+    except Exception as e:
+        print(f"⚠️ No se pudieron verificar columnas e índices: {e}")
+
+    # Índices de búsqueda de productos (trigram en Postgres)
+    try:
+        from app.services.product_search import ensure_search_indexes
+        if ensure_search_indexes():
+            print("✅ Índices de búsqueda trigram verificados")
+    except Exception as e:
+        print(f"⚠️ No se pudieron crear los índices de búsqueda: {e}")
+
+    # Columna e índice de búsqueda del listado de inventario
+    try:
+        from app.services.inventario_listado import ensure_inventario_search
+        actualizados = ensure_inventario_search()
+        if actualizados:
+            print(f"✅ Búsqueda de inventario completada para {actualizados} productos")
+    except Exception as e:
+        print(f"⚠️ No se pudo preparar la búsqueda de inventario: {e}")
+
+    # Saldos valorizados de los productos existentes antes de la valoración
+    try:
+        from app.services.valoracion import inicializar_saldos
+        inicializados = inicializar_saldos()
+        if inicializados:
+            print(f"✅ Saldos valorizados inicializados para {inicializados} productos")
+    except Exception as e:
+        print(f"⚠️ No se pudieron inicializar los saldos valorizados: {e}")
+
+    # Índice en memoria de códigos de barras y SKU existentes
+    try:
+        from app.utils.code_index import code_index
+        code_index.rebuild()
+        print("✅ Índice de códigos de barras cargado")
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar el índice de códigos de barras: {e}")
+
+    # Reconciliación periódica de las estadísticas de inventario
+    from app.utils.inventory_stats import inventory_stats, INVENTORY_STATS_RECONCILE_INTERVAL
+    inventory_stats.start_reconciler(app, INVENTORY_STATS_RECONCILE_INTERVAL)
+
+    # Snapshot diario de cantidades y valor del inventario
+    from app.services.inventario_snapshots import iniciar_programador
+    iniciar_programador(app)
+
+
 def create_app():
     app = Flask(__name__)
     CORS(app, supports_credentials=True)
@@ -190,12 +259,12 @@ def create_app():
         except ImportError as e:
             print(f"⚠️ Blueprint de órdenes de proveedor no encontrado: {e}")
 
-        # Crear tablas en caso de que no existan
-        try:
-            db.create_all()
-            print("✅ Tablas de base de datos creadas/verificadas correctamente")
-        except Exception as e:
-            print(f"❌ Error al crear tablas: {e}")
+        # Esquema, backfills, índices en memoria e hilos en segundo plano.
+        # Se omiten si create_app() se ejecuta dentro de un proceso hijo de
+        # multiprocessing (p. ej. un worker de los pools de etiquetas o de
+        # decodificación que reimporta el módulo principal).
+        if multiprocessing.parent_process() is None:
+            _tareas_de_arranque(app)
 
         # ⚠️ TEMPORAL: Inicialización de base de datos
         try:
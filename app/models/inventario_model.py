@@ -1,9 +1,24 @@
 from app import db
+from app.utils.text import normalize_text
 from datetime import datetime
+from sqlalchemy import case, event, func
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 class Producto(db.Model):
     __tablename__ = 'productos'
+    __table_args__ = (
+        # Listado paginado por cursor en (columna de orden, id)
+        db.Index('ix_productos_nombre_id', 'nombre', 'id'),
+        db.Index('ix_productos_cantidad_id', 'cantidad', 'id'),
+        db.Index('ix_productos_estado_id', 'estado', 'id'),
+        db.Index('ix_productos_categoria', 'categoria'),
+    )
+    # ix_productos_estado_id también sirve el filtro por estado
+    __obsolete_indexes__ = ('ix_productos_estado',)
+
+    # Columnas que se buscan desde el listado de inventario
+    CAMPOS_BUSQUEDA = ('codigo', 'nombre', 'descripcion', 'referencia', 'codigo_interno', 'codigo_equipo')
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -18,18 +33,21 @@ class Producto(db.Model):
     descripcion = db.Column(db.Text, nullable=True)
     serial = db.Column(db.String(100), nullable=True)
     costo_unitario = db.Column(db.Float, nullable=False, default=0)
-    cantidad = db.Column(db.Integer, default=0)
-    estado = db.Column(db.String(20), default='disponible')  # disponible, prestado, dañado
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    estado = db.Column(db.String(20), nullable=False, default='disponible')  # disponible, prestado, dañado
     categoria = db.Column(db.String(100), nullable=True)
     fecha_ingreso = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Texto normalizado (minúsculas, sin tildes) de CAMPOS_BUSQUEDA
+    busqueda = db.Column(db.Text, nullable=True)
+
     # Relación con movimientos
     movimientos = db.relationship('MovimientoInventario', backref='producto', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Producto {self.codigo} - {self.nombre}>'
 
-    @property
+    @hybrid_property
     def nivel_stock(self):
         """Retorna el nivel de stock: suficiente, bajo, critico"""
         if self.cantidad > 10:
@@ -39,9 +57,48 @@ class Producto(db.Model):
         else:
             return 'critico'
 
+    @nivel_stock.expression
+    def nivel_stock(cls):
+        """Mismo cálculo como CASE para filtrar en SQL"""
+        return case(
+            (cls.cantidad > 10, 'suficiente'),
+            (cls.cantidad > 5, 'bajo'),
+            else_='critico'
+        )
+
+    def texto_busqueda(self):
+        """Construye el valor normalizado de la columna busqueda"""
+        return ' '.join(
+            normalize_text(getattr(self, campo))
+            for campo in self.CAMPOS_BUSQUEDA
+            if getattr(self, campo)
+        )
+
+
+@event.listens_for(Producto, 'before_insert')
+@event.listens_for(Producto, 'before_update')
+def _actualizar_busqueda(mapper, connection, target):
+    target.busqueda = target.texto_busqueda()
+
+
+# Orden del listado por las columnas opcionales: la misma expresión
+# COALESCE que usa app/services/inventario_listado.ORDENES, junto al id
+for _campo in ('referencia', 'codigo_interno', 'codigo_equipo'):
+    db.Index(f'ix_productos_{_campo}_id',
+             func.coalesce(Producto.__table__.c[_campo], ''), Producto.__table__.c.id)
+del _campo
+
 
 class MovimientoInventario(db.Model):
     __tablename__ = 'movimientos_inventario'
+    __table_args__ = (
+        # Movimientos de una ventana de tiempo (snapshots y consultas históricas)
+        db.Index('ix_movimientos_fecha_id', 'fecha', 'id'),
+        # Historial paginado por (fecha, id) filtrando por producto, tipo o usuario
+        db.Index('ix_movimientos_producto_fecha_id', 'producto_id', 'fecha', 'id'),
+        db.Index('ix_movimientos_tipo_fecha_id', 'tipo', 'fecha', 'id'),
+        db.Index('ix_movimientos_usuario_fecha_id', 'usuario', 'fecha', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
@@ -53,5 +110,112 @@ class MovimientoInventario(db.Model):
     usuario = db.Column(db.String(100), nullable=False)
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Valoración: costo de la entrada o costo de ventas de la salida
+    costo_unitario = db.Column(db.Float, nullable=True)
+    costo_total = db.Column(db.Float, nullable=True)
+
     def __repr__(self):
         return f'<Movimiento {self.tipo} - Producto {self.producto_id}>'
+
+    @property
+    def delta(self):
+        """Cambio neto de cantidad que produjo el movimiento"""
+        return self.cantidad_nueva - self.cantidad_anterior
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'producto_id': self.producto_id,
+            'codigo': self.producto.codigo if self.producto else None,
+            'nombre': self.producto.nombre if self.producto else None,
+            'tipo': self.tipo,
+            'cantidad': self.cantidad,
+            'cantidad_anterior': self.cantidad_anterior,
+            'cantidad_nueva': self.cantidad_nueva,
+            'motivo': self.motivo,
+            'usuario': self.usuario,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'costo_unitario': self.costo_unitario,
+            'costo_total': self.costo_total
+        }
+
+
+class SnapshotInventario(db.Model):
+    """
+    Cantidad y valor de cada producto al cierre de un día (UTC).
+    Lo escribe el proceso diario de app/services/inventario_snapshots.py.
+    """
+    __tablename__ = 'inventario_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'producto_id', name='uq_inventario_snapshots_fecha_producto'),
+        db.Index('ix_inventario_snapshots_producto_fecha', 'producto_id', 'fecha'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), nullable=False)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    costo_unitario = db.Column(db.Float, nullable=False, default=0)
+    valor = db.Column(db.Float, nullable=False, default=0)
+    creado = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Snapshot {self.fecha} - Producto {self.producto_id}>'
+
+
+class CapaCosto(db.Model):
+    """
+    Capa de costo FIFO: unidades que entraron juntas a un mismo costo.
+    Las salidas consumen ``cantidad_restante`` de las capas más antiguas.
+    """
+    __tablename__ = 'capas_costo'
+    __table_args__ = (
+        db.Index('ix_capas_costo_producto_restante', 'producto_id', 'cantidad_restante', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), nullable=False)
+    movimiento_id = db.Column(db.Integer, db.ForeignKey('movimientos_inventario.id', ondelete='SET NULL'), nullable=True)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    cantidad_inicial = db.Column(db.Integer, nullable=False)
+    cantidad_restante = db.Column(db.Integer, nullable=False)
+    costo_unitario = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Capa {self.producto_id} {self.cantidad_restante}@{self.costo_unitario}>'
+
+
+class SaldoValorizado(db.Model):
+    """
+    Saldo valorizado de un producto, actualizado con cada movimiento por
+    app/services/valoracion.py: cantidad, valor por promedio ponderado y
+    por FIFO, y costo de ventas acumulado con cada método.
+    """
+    __tablename__ = 'saldos_valorizados'
+
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id', ondelete='CASCADE'), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    costo_promedio = db.Column(db.Float, nullable=False, default=0)
+    valor_promedio = db.Column(db.Float, nullable=False, default=0)
+    valor_fifo = db.Column(db.Float, nullable=False, default=0)
+    costo_ventas_promedio = db.Column(db.Float, nullable=False, default=0)
+    costo_ventas_fifo = db.Column(db.Float, nullable=False, default=0)
+    # Costo provisional de unidades vendidas sin stock (saldo negativo),
+    # pendiente de ajustar con la próxima entrada
+    valor_faltante = db.Column(db.Float, nullable=True, default=0)
+    actualizado = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'producto_id': self.producto_id,
+            'cantidad': self.cantidad,
+            'costo_promedio': round(self.costo_promedio, 4),
+            'valor_promedio': round(self.valor_promedio, 2),
+            'costo_fifo': round(self.valor_fifo / self.cantidad, 4) if self.cantidad > 0 else 0,
+            'valor_fifo': round(self.valor_fifo, 2),
+            'costo_ventas_promedio': round(self.costo_ventas_promedio, 2),
+            'costo_ventas_fifo': round(self.costo_ventas_fifo, 2),
+            'faltante': max(0, -self.cantidad),
+            'valor_faltante': round(self.valor_faltante or 0, 2),
+            'actualizado': self.actualizado.isoformat() if self.actualizado else None
+        }
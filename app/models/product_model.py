@@ -1,6 +1,13 @@
 from app import db
 from datetime import datetime
-import random
+from sqlalchemy import update, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+import os
+
+# Prefijo de empresa GS1. Sin prefijo asignado se usa el rango "20",
+# reservado por GS1 para numeración interna (circulación restringida)
+GS1_COMPANY_PREFIX = os.getenv('GS1_COMPANY_PREFIX', '20')
 
 class Product(db.Model):
     """
@@ -8,6 +15,14 @@ class Product(db.Model):
     Integrado con el sistema de inventarios existente.
     """
     __tablename__ = 'products'
+    __table_args__ = (
+        # Paginación por cursor en (name, id) y sincronización incremental
+        db.Index('ix_products_name_id', 'name', 'id'),
+        db.Index('ix_products_updated_at_id', 'updated_at', 'id'),
+    )
+    # Índices que ya no se declaran y se eliminan al arrancar (ver ensure_indexes):
+    # ix_products_name quedó cubierto por ix_products_name_id
+    __obsolete_indexes__ = ('ix_products_name',)
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -48,18 +63,18 @@ class Product(db.Model):
     def generate_barcode():
         """
         Genera un código de barras EAN-13 único y válido.
-        Incluye dígito de verificación según el algoritmo EAN-13.
+        Se toma del contador persistente de BarcodeSequence, por lo que no
+        colisiona con otros códigos asignados.
         """
-        # Generar 12 dígitos aleatorios
-        code = ''.join([str(random.randint(0, 9)) for _ in range(12)])
-        
-        # Calcular dígito de verificación
+        return BarcodeSequence.allocate_barcodes(1)[0]
+    
+    @staticmethod
+    def ean13_check_digit(code):
+        """Calcula el dígito de verificación EAN-13 de los primeros 12 dígitos"""
         odd_sum = sum(int(code[i]) for i in range(0, 12, 2))
         even_sum = sum(int(code[i]) for i in range(1, 12, 2))
         total = odd_sum + (even_sum * 3)
-        check_digit = (10 - (total % 10)) % 10
-        
-        return code + str(check_digit)
+        return (10 - (total % 10)) % 10
     
     def generate_qr_data(self):
         """
@@ -68,6 +83,51 @@ class Product(db.Model):
         """
         return f"PROD-{self.barcode}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
     
+    @staticmethod
+    def apply_stock_delta(product_id, quantity):
+        """
+        Aplica un cambio de stock con un único UPDATE atómico en la base de datos.
+        Las salidas solo se aplican si hay stock suficiente
+        (``WHERE stock >= :cantidad``), evitando actualizaciones perdidas
+        entre estaciones que operan el mismo producto.
+        
+        Args:
+            product_id: ID del producto
+            quantity: Cantidad a agregar (positivo) o restar (negativo)
+        
+        Returns:
+            int | None: Stock resultante o None si no había stock suficiente
+        """
+        now = datetime.utcnow()
+        stmt = update(Product).where(Product.id == product_id)
+        if quantity < 0:
+            stmt = stmt.where(Product.stock >= -quantity)
+        stmt = stmt.values(stock=Product.stock + quantity, updated_at=now)\
+            .execution_options(synchronize_session=False)
+        
+        if db.engine.dialect.update_returning:
+            new_stock = db.session.execute(stmt.returning(Product.stock)).scalar()
+        else:
+            # MySQL no soporta RETURNING: la fila queda bloqueada por el UPDATE
+            # hasta el commit, así que la lectura posterior es consistente
+            result = db.session.execute(stmt)
+            if result.rowcount == 0:
+                return None
+            new_stock = db.session.execute(
+                select(Product.stock).where(Product.id == product_id)
+            ).scalar()
+        
+        if new_stock is None:
+            return None
+        
+        # Sincronizar la instancia en sesión sin marcarla como modificada
+        product = db.session.identity_map.get(db.session.identity_key(Product, product_id))
+        if product is not None:
+            set_committed_value(product, 'stock', new_stock)
+            set_committed_value(product, 'updated_at', now)
+        
+        return new_stock
+    
     def update_stock(self, quantity, movement_type='manual'):
         """
         Actualiza el stock del producto y registra el movimiento.
@@ -75,47 +135,75 @@ class Product(db.Model):
         Args:
             quantity: Cantidad a agregar (positivo) o restar (negativo)
             movement_type: Tipo de movimiento ('entrada', 'salida', 'ajuste')
+        
+        Raises:
+            ValueError: Si la salida excede el stock disponible
         """
-        old_stock = self.stock
-        self.stock += quantity
+        new_stock = Product.apply_stock_delta(self.id, quantity)
+        if new_stock is None:
+            raise ValueError(f'Stock insuficiente para el producto {self.id}')
         
         # Registrar movimiento
         movement = InventoryMovement(
             product_id=self.id,
             type=movement_type,
             quantity=abs(quantity),
-            previous_stock=old_stock,
-            new_stock=self.stock,
+            previous_stock=new_stock - quantity,
+            new_stock=new_stock,
             created_at=datetime.utcnow()
         )
         db.session.add(movement)
+        return movement
         
     def is_low_stock(self):
         """Verifica si el stock está por debajo del mínimo"""
         return self.stock < self.min_stock
     
-    def to_dict(self):
-        """Convierte el producto a diccionario para JSON"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'barcode': self.barcode,
-            'qr_code': self.qr_code,
-            'sku': self.sku,
-            'price': float(self.price),
-            'cost': float(self.cost),
-            'stock': self.stock,
-            'min_stock': self.min_stock,
-            'category': self.category,
-            'supplier': self.supplier,
-            'active': self.active,
-            'is_low_stock': self.is_low_stock(),
-            'profit_margin': self.calculate_profit_margin(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'created_by': self.created_by
-        }
+    # Campos serializables y cómo obtenerlos (los calculados solo si se piden)
+    SERIALIZERS = {
+        'id': lambda p: p.id,
+        'name': lambda p: p.name,
+        'description': lambda p: p.description,
+        'barcode': lambda p: p.barcode,
+        'qr_code': lambda p: p.qr_code,
+        'sku': lambda p: p.sku,
+        'price': lambda p: float(p.price),
+        'cost': lambda p: float(p.cost),
+        'stock': lambda p: p.stock,
+        'min_stock': lambda p: p.min_stock,
+        'category': lambda p: p.category,
+        'supplier': lambda p: p.supplier,
+        'active': lambda p: p.active,
+        'is_low_stock': lambda p: p.is_low_stock(),
+        'profit_margin': lambda p: p.calculate_profit_margin(),
+        'created_at': lambda p: p.created_at.isoformat() if p.created_at else None,
+        'updated_at': lambda p: p.updated_at.isoformat() if p.updated_at else None,
+        'created_by': lambda p: p.created_by,
+    }
+    
+    # Columnas que necesita cada campo calculado
+    FIELD_DEPENDENCIES = {
+        'is_low_stock': ('stock', 'min_stock'),
+        'profit_margin': ('price', 'cost'),
+    }
+    
+    @staticmethod
+    def columns_for_fields(fields):
+        """Columnas a cargar para serializar solo ``fields``"""
+        columns = {'id', 'name'}
+        for field in fields:
+            columns.update(Product.FIELD_DEPENDENCIES.get(field, (field,)))
+        return [getattr(Product, column) for column in sorted(columns)]
+    
+    def to_dict(self, fields=None):
+        """
+        Convierte el producto a diccionario para JSON.
+        
+        Args:
+            fields: Campos a incluir (por defecto todos)
+        """
+        fields = fields or Product.SERIALIZERS.keys()
+        return {field: Product.SERIALIZERS[field](self) for field in fields}
     
     def calculate_profit_margin(self):
         """Calcula el margen de utilidad del producto"""
@@ -151,6 +239,9 @@ class InventoryMovement(db.Model):
     barcode_scanned = db.Column(db.String(100))
     notes = db.Column(db.Text)
     
+    # Identificador generado por el dispositivo (UUID) para detectar reenvíos
+    client_id = db.Column(db.String(36), unique=True, index=True)
+    
     # Auditoría
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.String(100))
@@ -169,6 +260,7 @@ class InventoryMovement(db.Model):
             'reference': self.reference,
             'barcode_scanned': self.barcode_scanned,
             'notes': self.notes,
+            'client_id': self.client_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'created_by': self.created_by
         }
@@ -187,7 +279,7 @@ class BarcodeLabel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     label_type = db.Column(db.String(50))  # 'barcode', 'qr', 'complete'
-    format = db.Column(db.String(50))  # 'png', 'pdf', 'svg'
+    format = db.Column(db.String(50))  # 'png', 'pdf', 'svg', 'zpl'
     quantity_printed = db.Column(db.Integer, default=1)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.String(100))
@@ -209,3 +301,102 @@ class BarcodeLabel(db.Model):
     
     def __repr__(self):
         return f'<BarcodeLabel {self.label_type} - Product {self.product_id}>'
+
+
+class BarcodeSequence(db.Model):
+    """
+    Contador persistente para asignar códigos EAN-13 por bloques.
+    Hay una fila por prefijo de empresa GS1; ``next_value`` es la siguiente
+    referencia de artículo libre dentro de ese prefijo.
+    """
+    __tablename__ = 'barcode_sequences'
+    
+    prefix = db.Column(db.String(12), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @staticmethod
+    def reserve_block(count, prefix=None):
+        """
+        Reserva ``count`` referencias consecutivas con un único UPDATE atómico.
+        
+        Returns:
+            range: Referencias de artículo reservadas
+        
+        Raises:
+            ValueError: Si el prefijo no es válido o el rango está agotado
+        """
+        prefix = prefix or GS1_COMPANY_PREFIX
+        if not prefix.isdigit() or not 1 <= len(prefix) <= 11:
+            raise ValueError(f'Prefijo GS1 inválido: {prefix}')
+        if count <= 0:
+            return range(0)
+        
+        stmt = update(BarcodeSequence)\
+            .where(BarcodeSequence.prefix == prefix)\
+            .values(next_value=BarcodeSequence.next_value + count, updated_at=datetime.utcnow())\
+            .execution_options(synchronize_session=False)
+        
+        for _ in range(2):
+            if db.engine.dialect.update_returning:
+                end = db.session.execute(stmt.returning(BarcodeSequence.next_value)).scalar()
+            else:
+                # MySQL no soporta RETURNING: la fila queda bloqueada por el UPDATE
+                end = None
+                if db.session.execute(stmt).rowcount:
+                    end = db.session.execute(
+                        select(BarcodeSequence.next_value).where(BarcodeSequence.prefix == prefix)
+                    ).scalar()
+            
+            if end is not None:
+                break
+            
+            # Primera asignación para este prefijo: crear el contador
+            try:
+                with db.session.begin_nested():
+                    db.session.add(BarcodeSequence(prefix=prefix, next_value=0))
+            except IntegrityError:
+                pass
+        else:
+            raise RuntimeError(f'No se pudo reservar códigos para el prefijo {prefix}')
+        
+        capacity = 10 ** (12 - len(prefix))
+        if end > capacity:
+            raise ValueError(f'Rango de códigos agotado para el prefijo {prefix}')
+        
+        return range(end - count, end)
+    
+    @staticmethod
+    def allocate_barcodes(count, prefix=None):
+        """
+        Asigna ``count`` códigos EAN-13 válidos y no usados por ningún producto.
+        
+        Args:
+            count (int): Cantidad de códigos a asignar
+            prefix (str): Prefijo de empresa GS1 (por defecto GS1_COMPANY_PREFIX)
+        
+        Returns:
+            list: Códigos EAN-13 con su dígito de verificación
+        """
+        prefix = prefix or GS1_COMPANY_PREFIX
+        width = 12 - len(prefix)
+        barcodes = []
+        
+        while len(barcodes) < count:
+            block = BarcodeSequence.reserve_block(count - len(barcodes), prefix)
+            candidates = []
+            for value in block:
+                code = f'{prefix}{value:0{width}d}'
+                candidates.append(code + str(Product.ean13_check_digit(code)))
+            
+            # Descartar códigos ya usados (p. ej. asignados antes del contador)
+            taken = {
+                row[0] for row in db.session.query(Product.barcode)
+                .filter(Product.barcode.in_(candidates)).all()
+            }
+            barcodes.extend(code for code in candidates if code not in taken)
+        
+        return barcodes
+    
+    def __repr__(self):
+        return f'<BarcodeSequence {self.prefix} - {self.next_value}>'
@@ -1,9 +1,27 @@
-from flask import Blueprint, request, jsonify, render_template, session
+from flask import Blueprint, request, jsonify, render_template, session, send_file, make_response, Response, stream_with_context
 from app import db
 from app.models.product_model import Product, InventoryMovement, BarcodeLabel
 from app.utils.barcode_generator import BarcodeGenerator
+from app.utils.barcode_cache import product_cache
+from app.utils.image_cache import image_cache
+from app.utils.prefix_index import product_prefix_index
+from app.utils.text import escape_like
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.event_bus import inventory_events, publish_stock_change, publish_stock_data
+from app.utils.barcode_decoder import decode_images
+from app.utils.inventory_stats import inventory_stats
+from app.utils.code_index import code_index
+from app.utils.label_templates import list_label_templates
+from app.services.label_sheet_generator import LabelSheetLayout, generate_label_sheet_pdf, MAX_SHEET_LABELS
+from app.services import product_import, product_search
+from app.services.zpl_label_generator import render_zpl_label, render_zpl_labels
 from datetime import datetime
-from sqlalchemy import or_, func
+import tempfile
+import queue
+import uuid
+from sqlalchemy import or_, insert, tuple_
+from sqlalchemy.orm import load_only
+from sqlalchemy.exc import IntegrityError
 
 barcode_bp = Blueprint('barcode', __name__, url_prefix='/barcode')
 
@@ -43,21 +61,28 @@ def scan_barcode():
                 'message': 'Código de barras no proporcionado'
             }), 400
         
-        # Buscar producto por código de barras
-        product = Product.query.filter_by(barcode=barcode, active=True).first()
+        # Consultar primero la caché en memoria
+        product_data = product_cache.get(barcode)
         
-        if not product:
-            return jsonify({
-                'success': False,
-                'message': f'Producto no encontrado con código: {barcode}',
-                'barcode': barcode,
-                'suggestion': 'create_product'
-            }), 404
+        if product_data is None:
+            # Buscar producto por código de barras
+            product = Product.query.filter_by(barcode=barcode, active=True).first()
+            
+            if not product:
+                return jsonify({
+                    'success': False,
+                    'message': f'Producto no encontrado con código: {barcode}',
+                    'barcode': barcode,
+                    'suggestion': 'create_product'
+                }), 404
+            
+            product_data = product.to_dict()
+            product_cache.set(barcode, product_data)
         
         return jsonify({
             'success': True,
             'message': 'Producto encontrado',
-            'product': product.to_dict()
+            'product': product_data
         }), 200
         
     except Exception as e:
@@ -67,6 +92,154 @@ def scan_barcode():
         }), 500
 
 
+@barcode_bp.route('/api/scan/batch', methods=['POST'])
+def scan_barcode_batch():
+    """
+    Resuelve en una sola consulta una lista de códigos escaneados.
+    Pensado para lectores portátiles que sincronizan escaneos acumulados.
+    """
+    try:
+        data = request.get_json() or {}
+        barcodes_input = data.get('barcodes') or []
+        
+        if not isinstance(barcodes_input, list):
+            return jsonify({
+                'success': False,
+                'message': 'El campo barcodes debe ser una lista'
+            }), 400
+        
+        # Normalizar y eliminar duplicados conservando el orden
+        barcodes = []
+        seen = set()
+        for code in barcodes_input:
+            code = str(code).strip() if code is not None else ''
+            if code and code not in seen:
+                seen.add(code)
+                barcodes.append(code)
+        
+        if not barcodes:
+            return jsonify({
+                'success': False,
+                'message': 'Códigos de barras no proporcionados'
+            }), 400
+        
+        # Resolver desde caché y consultar el resto con un único IN
+        resolved = {}
+        pending = []
+        for code in barcodes:
+            product_data = product_cache.get(code)
+            if product_data is None:
+                pending.append(code)
+            else:
+                resolved[code] = product_data
+        
+        if pending:
+            products = Product.query.filter(
+                Product.barcode.in_(pending),
+                Product.active == True
+            ).all()
+            for product in products:
+                product_data = product.to_dict()
+                product_cache.set(product.barcode, product_data)
+                resolved[product.barcode] = product_data
+        
+        results = []
+        for code in barcodes:
+            product_data = resolved.get(code)
+            results.append({
+                'barcode': code,
+                'found': product_data is not None,
+                'product': product_data
+            })
+        
+        found = len(resolved)
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'found': found,
+            'not_found': len(results) - found,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al buscar productos: {str(e)}'
+        }), 500
+
+
+# Límites para la decodificación de imágenes subidas
+DECODE_MAX_IMAGES = 50
+DECODE_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+@barcode_bp.route('/api/decode', methods=['POST'])
+def decode_uploaded_images():
+    """
+    Decodifica códigos de barras/QR de una o varias imágenes subidas
+    (campo ``images``) y los resuelve contra los productos en una consulta.
+    """
+    try:
+        files = request.files.getlist('images') or request.files.getlist('image')
+        
+        if not files:
+            return jsonify({
+                'success': False,
+                'message': 'No se proporcionaron imágenes'
+            }), 400
+        
+        if len(files) > DECODE_MAX_IMAGES:
+            return jsonify({
+                'success': False,
+                'message': f'Máximo {DECODE_MAX_IMAGES} imágenes por solicitud'
+            }), 400
+        
+        results = []
+        images = []
+        for file in files:
+            content = file.read(DECODE_MAX_IMAGE_BYTES + 1)
+            result = {'filename': file.filename}
+            results.append(result)
+            if len(content) > DECODE_MAX_IMAGE_BYTES:
+                result.update({'success': False, 'error': 'La imagen supera el tamaño máximo'})
+                continue
+            images.append((result, content))
+        
+        decoded = decode_images([content for _, content in images])
+        for (result, _), outcome in zip(images, decoded):
+            result.update(outcome)
+        
+        # Resolver todos los códigos encontrados con una sola consulta
+        codes = {
+            code['data']
+            for result in results if result.get('success')
+            for code in result['codes']
+        }
+        products = {}
+        if codes:
+            products = {
+                p.barcode: p.to_dict()
+                for p in Product.query.filter(Product.barcode.in_(codes), Product.active == True).all()
+            }
+        for result in results:
+            for code in result.get('codes', []):
+                code['product'] = products.get(code['data'])
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'found': sum(1 for r in results for c in r.get('codes', []) if c['product']),
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al decodificar imágenes: {str(e)}'
+        }), 500
+
+
 @barcode_bp.route('/api/verify/<barcode>', methods=['GET'])
 def verify_barcode(barcode):
     """Verifica si un código de barras ya existe en el sistema"""
@@ -74,8 +247,9 @@ def verify_barcode(barcode):
         # Validar formato del código
         validation = BarcodeGenerator.validate_barcode(barcode)
         
-        # Buscar en base de datos
-        exists = Product.query.filter_by(barcode=barcode).first() is not None
+        # Los negativos se responden desde el índice en memoria
+        exists = code_index.might_exist('barcode', barcode) and \
+            Product.query.filter_by(barcode=barcode).first() is not None
         
         return jsonify({
             'success': True,
@@ -96,6 +270,7 @@ def search_products():
     """
     Búsqueda avanzada de productos.
     Soporta búsqueda por nombre, código, SKU, categoría.
+    Con ``mode=ranked`` ordena por relevancia y pagina con ``limit``/``cursor``.
     """
     try:
         query_input = request.args.get('q') or ''
@@ -106,6 +281,21 @@ def search_products():
         
         low_stock = request.args.get('low_stock', 'false').lower() == 'true'
         
+        # Búsqueda indexada, ordenada por relevancia y paginada por cursor
+        if request.args.get('mode') == 'ranked':
+            result = product_search.search_products_ranked(
+                query,
+                category=category,
+                low_stock=low_stock,
+                limit=request.args.get('limit', 20, type=int),
+                cursor=request.args.get('cursor')
+            )
+            return jsonify({
+                'success': True,
+                'count': len(result['products']),
+                **result
+            }), 200
+        
         # Construir consulta base
         products_query = Product.query.filter_by(active=True)
         
@@ -137,6 +327,11 @@ def search_products():
             'products': [p.to_dict() for p in products]
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -144,6 +339,61 @@ def search_products():
         }), 500
 
 
+@barcode_bp.route('/api/autocomplete', methods=['GET'])
+def autocomplete_products():
+    """
+    Sugerencias por prefijo de código de barras, SKU o nombre.
+    Se responde desde el índice en memoria; solo si el índice no cubre todo
+    el catálogo se completa con una consulta por prefijo.
+    """
+    try:
+        prefix = (request.args.get('q') or '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        
+        if not prefix:
+            return jsonify({
+                'success': True,
+                'count': 0,
+                'suggestions': []
+            }), 200
+        
+        suggestions, complete = product_prefix_index.search(prefix, limit)
+        
+        if not complete and len(suggestions) < limit:
+            found_ids = {s['id'] for s in suggestions}
+            like = f'{escape_like(prefix)}%'
+            rows = db.session.query(Product.id, Product.barcode, Product.sku, Product.name)\
+                .filter(Product.active == True)\
+                .filter(or_(
+                    Product.barcode.like(like, escape='\\'),
+                    Product.sku.like(like, escape='\\'),
+                    Product.name.ilike(like, escape='\\')
+                ))\
+                .order_by(Product.name)\
+                .limit(limit).all()
+            for product_id, barcode, sku, name in rows:
+                if product_id not in found_ids and len(suggestions) < limit:
+                    suggestions.append({
+                        'id': product_id,
+                        'barcode': barcode,
+                        'sku': sku,
+                        'name': name,
+                        'match': 'database'
+                    })
+        
+        return jsonify({
+            'success': True,
+            'count': len(suggestions),
+            'suggestions': suggestions
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error en autocompletado: {str(e)}'
+        }), 500
+
+
 # ============================================
 # API: GESTIÓN DE PRODUCTOS
 # ============================================
@@ -177,7 +427,8 @@ def create_product_with_barcode():
                 }), 400
             
             # Verificar que no exista
-            if Product.query.filter_by(barcode=custom_barcode).first():
+            if code_index.might_exist('barcode', custom_barcode) and \
+                    Product.query.filter_by(barcode=custom_barcode).first():
                 return jsonify({
                     'success': False,
                     'message': f'El código de barras {custom_barcode} ya existe'
@@ -187,7 +438,7 @@ def create_product_with_barcode():
         sku = data.get('sku') or ''
         sku = sku.strip() if sku else ''
         
-        if sku and Product.query.filter_by(sku=sku).first():
+        if sku and code_index.might_exist('sku', sku) and Product.query.filter_by(sku=sku).first():
             return jsonify({
                 'success': False,
                 'message': f'El SKU {sku} ya existe'
@@ -212,7 +463,17 @@ def create_product_with_barcode():
         )
         
         db.session.add(product)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Código o SKU creado por otro proceso después de la verificación
+            db.session.rollback()
+            code_index.invalidate()
+            return jsonify({
+                'success': False,
+                'message': 'El código de barras o SKU ya existe'
+            }), 400
+        code_index.add(product.barcode, product.sku)
         
         # Generar imágenes de códigos
         barcode_img = BarcodeGenerator.generate_barcode_image(product.barcode)
@@ -232,10 +493,15 @@ def create_product_with_barcode():
             db.session.add(movement)
             db.session.commit()
         
+        product_data = product.to_dict()
+        product_cache.set(product.barcode, product_data)
+        product_prefix_index.upsert(product)
+        inventory_stats.track(product)
+        
         return jsonify({
             'success': True,
             'message': 'Producto creado exitosamente',
-            'product': product.to_dict(),
+            'product': product_data,
             'barcode_image': barcode_img.get('image') if barcode_img['success'] else None,
             'qr_image': qr_img.get('image') if qr_img['success'] else None
         }), 201
@@ -248,6 +514,53 @@ def create_product_with_barcode():
         }), 500
 
 
+@barcode_bp.route('/api/product/import', methods=['POST'])
+def import_products():
+    """
+    Importa un catálogo de productos desde un archivo CSV o XLSX.
+    Columnas: name, price, cost y opcionalmente barcode, sku, description,
+    stock, min_stock, category, supplier. Con ``mode=upsert`` se actualizan
+    los productos existentes (por código de barras o SKU).
+    """
+    try:
+        file = request.files.get('file')
+        mode = request.form.get('mode', 'insert')
+        
+        if not file or not file.filename:
+            return jsonify({
+                'success': False,
+                'message': 'No se proporcionó un archivo'
+            }), 400
+        
+        result = product_import.import_products(
+            file,
+            mode=mode,
+            created_by=session.get('username', 'system')
+        )
+        product_prefix_index.invalidate()
+        inventory_stats.invalidate()
+        code_index.invalidate()
+        
+        return jsonify({
+            'success': True,
+            'message': f"Importación completada: {result['created']} creados, {result['updated']} actualizados",
+            **result
+        }), 200
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al importar productos: {str(e)}'
+        }), 500
+
+
 @barcode_bp.route('/api/product/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Obtiene información detallada de un producto"""
@@ -303,6 +616,11 @@ def update_product(product_id):
         product.updated_at = datetime.utcnow()
         db.session.commit()
         
+        product_cache.invalidate(product.barcode)
+        product_prefix_index.upsert(product)
+        inventory_stats.track(product)
+        code_index.add(product.barcode, product.sku)
+        
         return jsonify({
             'success': True,
             'message': 'Producto actualizado exitosamente',
@@ -319,23 +637,105 @@ def update_product(product_id):
 
 @barcode_bp.route('/api/products', methods=['GET'])
 def list_products():
-    """Lista todos los productos activos con sus códigos"""
+    """
+    Lista los productos activos con sus códigos.
+    
+    Parámetros:
+        cursor / limit: paginación por cursor en (name, id)
+        include_total: agrega el conteo total (consulta adicional)
+        fields: campos a incluir, p. ej. ``id,barcode,stock``
+        since: solo productos modificados después de esta fecha (ISO 8601),
+               incluyendo los desactivados, para sincronización incremental
+        page / per_page: paginación por páginas (compatibilidad)
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        fields = None
+        fields_input = request.args.get('fields') or ''
+        if fields_input:
+            fields = [f.strip() for f in fields_input.split(',') if f.strip()]
+            invalid = [f for f in fields if f not in Product.SERIALIZERS]
+            if invalid:
+                return jsonify({
+                    'success': False,
+                    'message': f'Campos no válidos: {", ".join(invalid)}'
+                }), 400
+        
+        since = None
+        since_input = request.args.get('since') or ''
+        if since_input:
+            try:
+                since = datetime.fromisoformat(since_input.replace('Z', '+00:00')).replace(tzinfo=None)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': 'Parámetro since inválido (use ISO 8601)'
+                }), 400
         
-        products = Product.query.filter_by(active=True)\
-            .order_by(Product.name)\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        server_time = datetime.utcnow()
+        products_query = Product.query
         
-        return jsonify({
+        if since:
+            products_query = products_query.filter(Product.updated_at > since)
+        else:
+            products_query = products_query.filter_by(active=True)
+        
+        if fields:
+            products_query = products_query.options(load_only(*Product.columns_for_fields(fields)))
+        
+        # Paginación por páginas (compatibilidad con clientes anteriores)
+        if 'page' in request.args and 'cursor' not in request.args:
+            page = request.args.get('page', 1, type=int)
+            per_page = request.args.get('per_page', 50, type=int)
+            
+            products = products_query\
+                .order_by(Product.name, Product.id)\
+                .paginate(page=page, per_page=per_page, error_out=False)
+            
+            return jsonify({
+                'success': True,
+                'count': products.total,
+                'pages': products.pages,
+                'current_page': products.page,
+                'products': [p.to_dict(fields) for p in products.items]
+            }), 200
+        
+        limit = max(1, min(request.args.get('limit', 50, type=int), 1000))
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        
+        total = products_query.order_by(None).count() if include_total else None
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            last_name, last_id = decode_cursor(cursor)
+            products_query = products_query.filter(
+                tuple_(Product.name, Product.id) > tuple_(last_name, last_id)
+            )
+        
+        products = products_query\
+            .order_by(Product.name, Product.id)\
+            .limit(limit + 1).all()
+        
+        has_more = len(products) > limit
+        products = products[:limit]
+        next_cursor = encode_cursor([products[-1].name, products[-1].id]) if has_more else None
+        
+        response = {
             'success': True,
-            'count': products.total,
-            'pages': products.pages,
-            'current_page': products.page,
-            'products': [p.to_dict() for p in products.items]
-        }), 200
+            'products': [p.to_dict(fields) for p in products],
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'server_time': server_time.isoformat()
+        }
+        if total is not None:
+            response['count'] = total
+        
+        return jsonify(response), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -347,6 +747,35 @@ def list_products():
 # API: MOVIMIENTOS DE INVENTARIO
 # ============================================
 
+def _parse_client_id(value):
+    """
+    Normaliza el identificador de movimiento generado por el dispositivo.
+    
+    Raises:
+        ValueError: Si no es un UUID válido
+    """
+    if value in (None, ''):
+        return None
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise ValueError(f'client_id inválido (se espera un UUID): {value}')
+
+
+def _duplicate_movement_response(client_id):
+    """Respuesta para un movimiento ya registrado con el mismo client_id"""
+    movement = InventoryMovement.query.filter_by(client_id=client_id).first()
+    if not movement:
+        return None
+    return jsonify({
+        'success': True,
+        'duplicate': True,
+        'message': 'Movimiento ya registrado',
+        'product': movement.product.to_dict() if movement.product else None,
+        'movement': movement.to_dict()
+    }), 200
+
+
 @barcode_bp.route('/api/inventory/entry', methods=['POST'])
 def inventory_entry():
     """Registra una entrada de inventario mediante escaneo"""
@@ -360,6 +789,7 @@ def inventory_entry():
         reference = data.get('reference', '')
         
         current_user = session.get('username', 'system')
+        client_id = _parse_client_id(data.get('client_id'))
         
         if not barcode:
             return jsonify({
@@ -373,6 +803,12 @@ def inventory_entry():
                 'message': 'La cantidad debe ser mayor a 0'
             }), 400
         
+        # Reenvío de un movimiento ya registrado
+        if client_id:
+            duplicate = _duplicate_movement_response(client_id)
+            if duplicate:
+                return duplicate
+        
         # Buscar producto
         product = Product.query.filter_by(barcode=barcode, active=True).first()
         
@@ -382,36 +818,61 @@ def inventory_entry():
                 'message': f'Producto no encontrado con código: {barcode}'
             }), 404
         
-        # Guardar stock anterior
-        previous_stock = product.stock
+        # Sumar stock con un UPDATE atómico (sin leer-modificar-escribir)
+        new_stock = Product.apply_stock_delta(product.id, quantity)
         
-        # Actualizar stock
-        product.stock += quantity
-        product.updated_at = datetime.utcnow()
+        if new_stock is None:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': f'Producto no encontrado con código: {barcode}'
+            }), 404
+        
+        previous_stock = new_stock - quantity
         
-        # Registrar movimiento
+        # Registrar movimiento con los valores devueltos por la base de datos
         movement = InventoryMovement(
             product_id=product.id,
             type='entrada',
             quantity=quantity,
             previous_stock=previous_stock,
-            new_stock=product.stock,
+            new_stock=new_stock,
             reason=reason,
             reference=reference,
             barcode_scanned=barcode,
+            client_id=client_id,
             created_by=current_user
         )
         
         db.session.add(movement)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Otro envío con el mismo client_id se confirmó primero
+            db.session.rollback()
+            duplicate = _duplicate_movement_response(client_id) if client_id else None
+            if duplicate:
+                return duplicate
+            raise
+        
+        product_data = product.to_dict()
+        product_cache.set(barcode, product_data)
+        inventory_stats.track(product)
+        publish_stock_change(product, previous_stock, movement.to_dict())
         
         return jsonify({
             'success': True,
             'message': f'Entrada registrada: {quantity} unidades',
-            'product': product.to_dict(),
+            'product': product_data,
             'movement': movement.to_dict()
         }), 200
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -433,6 +894,7 @@ def inventory_exit():
         reference = data.get('reference', '')
         
         current_user = session.get('username', 'system')
+        client_id = _parse_client_id(data.get('client_id'))
         
         if not barcode:
             return jsonify({
@@ -446,6 +908,12 @@ def inventory_exit():
                 'message': 'La cantidad debe ser mayor a 0'
             }), 400
         
+        # Reenvío de un movimiento ya registrado
+        if client_id:
+            duplicate = _duplicate_movement_response(client_id)
+            if duplicate:
+                return duplicate
+        
         # Buscar producto
         product = Product.query.filter_by(barcode=barcode, active=True).first()
         
@@ -455,35 +923,46 @@ def inventory_exit():
                 'message': f'Producto no encontrado con código: {barcode}'
             }), 404
         
-        # Verificar stock disponible
-        if product.stock < quantity:
+        # Descontar stock con un UPDATE condicional (stock >= cantidad)
+        new_stock = Product.apply_stock_delta(product.id, -quantity)
+        
+        if new_stock is None:
+            db.session.rollback()
+            db.session.refresh(product)
             return jsonify({
                 'success': False,
                 'message': f'Stock insuficiente. Disponible: {product.stock}, Solicitado: {quantity}'
             }), 400
         
-        # Guardar stock anterior
-        previous_stock = product.stock
-        
-        # Actualizar stock
-        product.stock -= quantity
-        product.updated_at = datetime.utcnow()
-        
-        # Registrar movimiento
+        # Registrar movimiento con los valores devueltos por la base de datos
         movement = InventoryMovement(
             product_id=product.id,
             type='salida',
             quantity=quantity,
-            previous_stock=previous_stock,
-            new_stock=product.stock,
+            previous_stock=new_stock + quantity,
+            new_stock=new_stock,
             reason=reason,
             reference=reference,
             barcode_scanned=barcode,
+            client_id=client_id,
             created_by=current_user
         )
         
         db.session.add(movement)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Otro envío con el mismo client_id se confirmó primero
+            db.session.rollback()
+            duplicate = _duplicate_movement_response(client_id) if client_id else None
+            if duplicate:
+                return duplicate
+            raise
+        
+        product_data = product.to_dict()
+        product_cache.set(barcode, product_data)
+        inventory_stats.track(product)
+        publish_stock_change(product, new_stock + quantity, movement.to_dict())
         
         # Alerta de stock bajo
         alert = None
@@ -493,11 +972,17 @@ def inventory_exit():
         return jsonify({
             'success': True,
             'message': f'Salida registrada: {quantity} unidades',
-            'product': product.to_dict(),
+            'product': product_data,
             'movement': movement.to_dict(),
             'alert': alert
         }), 200
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -506,6 +991,263 @@ def inventory_exit():
         }), 500
 
 
+def _apply_movement_lines(lines, strict=False, require_client_id=False):
+    """
+    Aplica en una sola transacción una lista de líneas de entrada/salida.
+    Bloquea cada producto una vez (ordenado por id), aplica el delta neto
+    y crea todos los movimientos con una inserción masiva. Las líneas con
+    un ``client_id`` ya registrado se omiten como duplicadas.
+    
+    Returns:
+        tuple: (respuesta JSON, código HTTP)
+    """
+    current_user = session.get('username', 'system')
+    
+    # Validar formato de cada línea
+    results = []
+    parsed = []
+    for index, line in enumerate(lines):
+        line = line if isinstance(line, dict) else {}
+        barcode = str(line.get('barcode') or '').strip()
+        movement_type = line.get('type')
+        
+        result = {
+            'index': index,
+            'barcode': barcode,
+            'type': movement_type,
+            'success': False
+        }
+        results.append(result)
+        
+        try:
+            quantity = int(line.get('quantity', 1))
+        except (TypeError, ValueError):
+            result['message'] = 'Cantidad inválida'
+            continue
+        result['quantity'] = quantity
+        
+        try:
+            client_id = _parse_client_id(line.get('client_id'))
+        except ValueError as e:
+            result['message'] = str(e)
+            continue
+        result['client_id'] = client_id
+        
+        if require_client_id and not client_id:
+            result['message'] = 'client_id requerido'
+        elif not barcode:
+            result['message'] = 'Código de barras no proporcionado'
+        elif movement_type not in ('entrada', 'salida'):
+            result['message'] = 'El tipo debe ser entrada o salida'
+        elif quantity <= 0:
+            result['message'] = 'La cantidad debe ser mayor a 0'
+        else:
+            parsed.append((result, line))
+    
+    # Descartar reenvíos: client_id ya registrados o repetidos en el lote
+    client_ids = [result['client_id'] for result, _ in parsed if result['client_id']]
+    registered = set()
+    if client_ids:
+        registered = {
+            row[0] for row in db.session.query(InventoryMovement.client_id)
+            .filter(InventoryMovement.client_id.in_(client_ids)).all()
+        }
+    pending = []
+    for result, line in parsed:
+        client_id = result['client_id']
+        if client_id and client_id in registered:
+            result.update({
+                'success': True,
+                'duplicate': True,
+                'message': 'Movimiento ya registrado'
+            })
+            continue
+        if client_id:
+            registered.add(client_id)
+        pending.append((result, line))
+    parsed = pending
+    
+    # Bloquear productos afectados en orden determinista
+    barcodes = {result['barcode'] for result, _ in parsed}
+    products = {}
+    if barcodes:
+        locked = Product.query.filter(
+            Product.barcode.in_(barcodes),
+            Product.active == True
+        ).order_by(Product.id).with_for_update().all()
+        products = {p.barcode: p for p in locked}
+    
+    # Aplicar líneas sobre el stock en curso de cada producto
+    original_stock = {p.id: p.stock for p in products.values()}
+    running_stock = dict(original_stock)
+    now = datetime.utcnow()
+    movement_rows = []
+    
+    for result, line in parsed:
+        barcode = result['barcode']
+        quantity = result['quantity']
+        product = products.get(barcode)
+        
+        if not product:
+            result['message'] = f'Producto no encontrado con código: {barcode}'
+            continue
+        
+        previous_stock = running_stock[product.id]
+        if result['type'] == 'salida':
+            if previous_stock < quantity:
+                result['message'] = f'Stock insuficiente. Disponible: {previous_stock}, Solicitado: {quantity}'
+                continue
+            new_stock = previous_stock - quantity
+            default_reason = 'Salida por escaneo'
+        else:
+            new_stock = previous_stock + quantity
+            default_reason = 'Entrada por escaneo'
+        
+        running_stock[product.id] = new_stock
+        movement_rows.append({
+            'product_id': product.id,
+            'type': result['type'],
+            'quantity': quantity,
+            'previous_stock': previous_stock,
+            'new_stock': new_stock,
+            'reason': line.get('reason') or default_reason,
+            'reference': line.get('reference', ''),
+            'barcode_scanned': barcode,
+            'client_id': result['client_id'],
+            'created_at': now,
+            'created_by': current_user
+        })
+        result.update({
+            'success': True,
+            'product_id': product.id,
+            'previous_stock': previous_stock,
+            'new_stock': new_stock
+        })
+    
+    rejected = [r for r in results if not r['success']]
+    duplicates = [r for r in results if r.get('duplicate')]
+    
+    if strict and rejected:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Lote rechazado: {len(rejected)} línea(s) con error',
+            'results': results
+        }), 400
+    
+    # Escribir el stock neto y los movimientos en una sola transacción
+    changed = [p for p in products.values() if running_stock[p.id] != p.stock]
+    for product in changed:
+        product.stock = running_stock[product.id]
+        product.updated_at = now
+    
+    # Serializar antes del commit: después los productos quedan expirados
+    # y leerlos costaría un SELECT por producto
+    products_data = [product.to_dict() for product in changed]
+    product_names = {p.id: p.name for p in products.values()}
+    
+    movement_ids = [None] * len(movement_rows)
+    try:
+        if movement_rows:
+            stmt = insert(InventoryMovement)
+            if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+                movement_ids = db.session.execute(
+                    stmt.returning(InventoryMovement.id, sort_by_parameter_order=True),
+                    movement_rows
+                ).scalars().all()
+            else:
+                # MySQL no soporta RETURNING: los eventos se publican sin id
+                db.session.execute(stmt, movement_rows)
+        db.session.commit()
+    except IntegrityError:
+        # Un envío concurrente registró los mismos client_id: reintentar
+        # aplica el lote omitiendo los ya registrados
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Conflicto con un envío concurrente, reintente la sincronización',
+            'retry': True
+        }), 409
+    
+    for data in products_data:
+        product_cache.set(data['barcode'], data)
+        inventory_stats.track_values(data['id'], data['active'], data['stock'], data['cost'], data['min_stock'])
+    
+    # Mismo formato que InventoryMovement.to_dict() en el resto de eventos
+    for movement_id, row in zip(movement_ids, movement_rows):
+        movement_data = InventoryMovement(**row).to_dict()
+        movement_data.update({'id': movement_id, 'product_name': product_names[row['product_id']]})
+        inventory_events.publish('movement', movement_data)
+    for data in products_data:
+        publish_stock_data(data, original_stock[data['id']])
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(movement_rows)} movimiento(s) registrados',
+        'applied': len(movement_rows),
+        'duplicates': len(duplicates),
+        'rejected': len(rejected),
+        'results': results
+    }), 200
+
+
+@barcode_bp.route('/api/inventory/bulk', methods=['POST'])
+def inventory_bulk():
+    """
+    Registra en una sola transacción una lista mixta de entradas y salidas.
+    Con ``strict`` cualquier línea rechazada anula todo el lote.
+    """
+    try:
+        data = request.get_json() or {}
+        lines = data.get('lines') or []
+        
+        if not isinstance(lines, list) or not lines:
+            return jsonify({
+                'success': False,
+                'message': 'No se proporcionaron líneas de movimiento'
+            }), 400
+        
+        return _apply_movement_lines(lines, strict=bool(data.get('strict', False)))
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al registrar movimientos: {str(e)}'
+        }), 500
+
+
+@barcode_bp.route('/api/inventory/sync', methods=['POST'])
+def inventory_sync():
+    """
+    Aplica el diario de escaneos acumulado sin conexión por un dispositivo.
+    Cada línea debe traer su ``client_id`` (UUID); los reenvíos se detectan
+    y se omiten, así que el dispositivo puede reintentar sin duplicar stock.
+    """
+    try:
+        data = request.get_json() or {}
+        journal = data.get('journal') or []
+        
+        if not isinstance(journal, list) or not journal:
+            return jsonify({
+                'success': False,
+                'message': 'No se proporcionó el diario de escaneos'
+            }), 400
+        
+        return _apply_movement_lines(
+            journal,
+            strict=bool(data.get('strict', False)),
+            require_client_id=True
+        )
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al sincronizar movimientos: {str(e)}'
+        }), 500
+
+
 @barcode_bp.route('/api/inventory/movements/<int:product_id>', methods=['GET'])
 def get_product_movements(product_id):
     """Obtiene historial de movimientos de un producto"""
@@ -560,6 +1302,27 @@ def generate_barcode():
         }), 500
 
 
+# Tamaño de módulo (píxeles por cuadro) admitido para los códigos QR
+QR_MIN_SIZE = 1
+QR_MAX_SIZE = 40
+
+
+def _qr_size(value):
+    """Tamaño de módulo del QR como entero, o None si no es válido o está fuera de rango"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return None
+    return size if QR_MIN_SIZE <= size <= QR_MAX_SIZE else None
+
+
+def _qr_size_error():
+    return jsonify({
+        'success': False,
+        'message': f'El tamaño del QR debe ser un entero entre {QR_MIN_SIZE} y {QR_MAX_SIZE}'
+    }), 400
+
+
 @barcode_bp.route('/api/generate/qr', methods=['POST'])
 def generate_qr():
     """Genera un código QR para datos dados"""
@@ -568,7 +1331,7 @@ def generate_qr():
         qr_data_input = data.get('data') or ''
         qr_data = qr_data_input.strip() if qr_data_input else ''
         
-        size = data.get('size', 10)
+        size = _qr_size(data.get('size', 10))
         error_correction = data.get('error_correction', 'M')
         
         if not qr_data:
@@ -577,6 +1340,9 @@ def generate_qr():
                 'message': 'Datos no proporcionados'
             }), 400
         
+        if size is None:
+            return _qr_size_error()
+        
         result = BarcodeGenerator.generate_qr_image(qr_data, size, error_correction)
         
         return jsonify(result), 200 if result['success'] else 400
@@ -590,7 +1356,10 @@ def generate_qr():
 
 @barcode_bp.route('/api/generate/label/<int:product_id>', methods=['GET'])
 def generate_product_label(product_id):
-    """Genera una etiqueta completa para un producto"""
+    """
+    Genera una etiqueta completa para un producto.
+    Con ``format=zpl`` retorna la etiqueta en ZPL para impresoras Zebra.
+    """
     try:
         product = Product.query.get(product_id)
         
@@ -601,10 +1370,18 @@ def generate_product_label(product_id):
             }), 404
         
         include_qr = request.args.get('include_qr', 'false').lower() == 'true'
+        template = request.args.get('template')
+        
+        if request.args.get('format') == 'zpl':
+            copies = max(1, request.args.get('copies', 1, type=int))
+            zpl = render_zpl_label(product.to_dict(), include_qr, template, copies)
+            _record_labels([product.id], 'complete', 'zpl', copies)
+            return _zpl_response(zpl, f'etiqueta_{product.id}.zpl')
         
         result = BarcodeGenerator.generate_product_label(
             product.to_dict(), 
-            include_qr=include_qr
+            include_qr=include_qr,
+            template=template
         )
         
         # Registrar etiqueta generada
@@ -628,9 +1405,28 @@ def generate_product_label(product_id):
         }), 500
 
 
+@barcode_bp.route('/api/generate/labels/templates', methods=['GET'])
+def get_label_templates():
+    """Lista las plantillas de etiqueta disponibles"""
+    try:
+        return jsonify({
+            'success': True,
+            'templates': list_label_templates()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener plantillas: {str(e)}'
+        }), 500
+
+
 @barcode_bp.route('/api/generate/labels/batch', methods=['POST'])
 def generate_batch_labels():
-    """Genera etiquetas en lote para múltiples productos"""
+    """
+    Genera etiquetas en lote para múltiples productos.
+    Con ``format: 'pdf'`` retorna una hoja multi-etiqueta lista para imprimir.
+    """
     try:
         data = request.get_json()
         product_ids = data.get('product_ids', [])
@@ -642,10 +1438,33 @@ def generate_batch_labels():
                 'message': 'No se proporcionaron IDs de productos'
             }), 400
         
+        # Hoja PDF multi-etiqueta con códigos vectoriales
+        if data.get('format') == 'pdf':
+            return _generate_label_sheet(product_ids, include_qr, data.get('layout'))
+        
+        # Documento ZPL con una etiqueta por producto
+        if data.get('format') == 'zpl':
+            try:
+                copies = max(1, int(data.get('copies', 1)))
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'message': 'El número de copias debe ser un entero'
+                }), 400
+            products = Product.query.filter(Product.id.in_(product_ids))\
+                .order_by(Product.name, Product.id).all()
+            zpl = render_zpl_labels(
+                (p.to_dict() for p in products), include_qr, data.get('template'), copies
+            )
+            _record_labels([p.id for p in products], 'batch', 'zpl', copies)
+            return _zpl_response(zpl, f'etiquetas_{datetime.now().strftime("%Y%m%d_%H%M")}.zpl')
+        
         products = Product.query.filter(Product.id.in_(product_ids)).all()
         products_data = [p.to_dict() for p in products]
         
-        result = BarcodeGenerator.generate_batch_labels(products_data, include_qr)
+        result = BarcodeGenerator.generate_batch_labels(
+            products_data, include_qr, template=data.get('template')
+        )
         
         # Registrar etiquetas generadas
         current_user = session.get('username', 'system')
@@ -669,6 +1488,238 @@ def generate_batch_labels():
         }), 500
 
 
+def _record_labels(product_ids, label_type, label_format, quantity=1):
+    """Registra las etiquetas generadas con una sola inserción"""
+    if not product_ids:
+        return
+    current_user = session.get('username', 'system')
+    now = datetime.utcnow()
+    db.session.execute(insert(BarcodeLabel), [{
+        'product_id': product_id,
+        'label_type': label_type,
+        'format': label_format,
+        'quantity_printed': quantity,
+        'created_at': now,
+        'created_by': current_user
+    } for product_id in product_ids])
+    db.session.commit()
+
+
+def _zpl_response(zpl, filename):
+    """Envía un documento ZPL como archivo de texto"""
+    response = make_response(zpl)
+    response.mimetype = 'application/zpl'
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def _generate_label_sheet(product_ids, include_qr, layout_options):
+    """
+    Genera la hoja de etiquetas en PDF recorriendo los productos por lotes
+    y la envía al cliente desde un archivo temporal. El documento no se
+    transmite por partes: se arma completo y por eso se limita a
+    MAX_SHEET_LABELS etiquetas por solicitud.
+    """
+    try:
+        layout = LabelSheetLayout.from_dict(layout_options)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': f'Distribución de etiquetas inválida: {str(e)}'
+        }), 400
+    
+    if len(set(product_ids)) > MAX_SHEET_LABELS:
+        return jsonify({
+            'success': False,
+            'message': f'Máximo {MAX_SHEET_LABELS} etiquetas por hoja PDF; divida el lote'
+        }), 400
+    
+    printed_ids = []
+    
+    def iter_products():
+        query = Product.query.filter(Product.id.in_(product_ids))\
+            .order_by(Product.name, Product.id)\
+            .yield_per(200)
+        for product in query:
+            printed_ids.append(product.id)
+            yield {
+                'name': product.name,
+                'sku': product.sku,
+                'price': product.price,
+                'barcode': product.barcode,
+                'qr_code': product.qr_code
+            }
+    
+    # El PDF se escribe a disco si supera 8 MB para mantener la memoria acotada
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    generate_label_sheet_pdf(iter_products(), output, layout, include_qr)
+    output.seek(0)
+    
+    # Registrar etiquetas generadas
+    _record_labels(printed_ids, 'batch', 'pdf')
+    
+    return send_file(
+        output,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f'etiquetas_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
+    )
+
+
+# ============================================
+# API: IMÁGENES BINARIAS CON CACHÉ HTTP
+# ============================================
+
+IMAGE_MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def _not_modified(etag):
+    """Indica si el cliente ya tiene la versión ``etag`` (If-None-Match)"""
+    return request.if_none_match.contains(etag)
+
+
+def _image_response(content, image_format, etag, max_age):
+    """Construye la respuesta binaria con ETag fuerte y Cache-Control"""
+    response = make_response(content) if content is not None else make_response('', 304)
+    if content is not None:
+        response.mimetype = IMAGE_MIMETYPES[image_format]
+    response.set_etag(etag)
+    response.cache_control.max_age = max_age
+    if max_age:
+        response.cache_control.public = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+@barcode_bp.route('/api/image/barcode/<code>', methods=['GET'])
+def barcode_image(code):
+    """Retorna el código de barras como imagen PNG o SVG"""
+    try:
+        barcode_type = request.args.get('type', 'ean13')
+        image_format = request.args.get('format', 'png').lower()
+        
+        if image_format not in IMAGE_MIMETYPES:
+            return jsonify({
+                'success': False,
+                'message': f'Formato de imagen no soportado: {image_format}'
+            }), 400
+        
+        # La imagen depende solo de sus parámetros: la clave sirve como ETag
+        etag = BarcodeGenerator.barcode_cache_key(code, barcode_type, image_format)
+        if _not_modified(etag):
+            return _image_response(None, image_format, etag, 86400)
+        
+        content = BarcodeGenerator.render_barcode(code, barcode_type, image_format)
+        return _image_response(content, image_format, etag, 86400)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al generar código de barras: {str(e)}'
+        }), 500
+
+
+@barcode_bp.route('/api/image/qr', methods=['GET'])
+def qr_image():
+    """Retorna un código QR como imagen PNG o SVG"""
+    try:
+        qr_data = (request.args.get('data') or '').strip()
+        size = _qr_size(request.args.get('size', 10))
+        error_correction = request.args.get('error_correction', 'M')
+        image_format = request.args.get('format', 'png').lower()
+        
+        if not qr_data:
+            return jsonify({
+                'success': False,
+                'message': 'Datos no proporcionados'
+            }), 400
+        
+        if size is None:
+            return _qr_size_error()
+        
+        if image_format not in IMAGE_MIMETYPES:
+            return jsonify({
+                'success': False,
+                'message': f'Formato de imagen no soportado: {image_format}'
+            }), 400
+        
+        if error_correction not in BarcodeGenerator.QR_ERROR_LEVELS:
+            error_correction = 'M'
+        
+        etag = BarcodeGenerator.qr_cache_key(qr_data, size, error_correction, image_format)
+        if _not_modified(etag):
+            return _image_response(None, image_format, etag, 86400)
+        
+        content = BarcodeGenerator.render_qr(qr_data, size, error_correction, image_format)
+        return _image_response(content, image_format, etag, 86400)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al generar código QR: {str(e)}'
+        }), 500
+
+
+@barcode_bp.route('/api/image/label/<int:product_id>', methods=['GET'])
+def label_image(product_id):
+    """Retorna la etiqueta de un producto como imagen PNG"""
+    try:
+        product = Product.query.get(product_id)
+        
+        if not product:
+            return jsonify({
+                'success': False,
+                'message': 'Producto no encontrado'
+            }), 404
+        
+        include_qr = request.args.get('include_qr', 'false').lower() == 'true'
+        template = request.args.get('template') or ''
+        
+        # El ETag es la clave de caché de la etiqueta: cambia con los datos
+        # del producto, la plantilla y su configuración y las opciones de renderizado
+        product_data = product.to_dict()
+        try:
+            etag = BarcodeGenerator.label_cache_key(product_data, include_qr, template or None)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        if _not_modified(etag):
+            return _image_response(None, 'png', etag, 0)
+        
+        content = BarcodeGenerator.render_product_label(product_data, include_qr, template or None)
+        
+        # Registrar etiqueta generada
+        label_record = BarcodeLabel(
+            product_id=product.id,
+            label_type='complete',
+            format='png',
+            quantity_printed=1,
+            created_by=session.get('username', 'system')
+        )
+        db.session.add(label_record)
+        db.session.commit()
+        
+        return _image_response(content, 'png', etag, 0)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error al generar etiqueta: {str(e)}'
+        }), 500
+
+
 # ============================================
 # API: ESTADÍSTICAS Y REPORTES
 # ============================================
@@ -677,19 +1728,8 @@ def generate_batch_labels():
 def get_general_stats():
     """Obtiene estadísticas generales del sistema de códigos de barras"""
     try:
-        total_products = Product.query.filter_by(active=True).count()
-        low_stock_products = Product.query.filter(
-            Product.active == True,
-            Product.stock < Product.min_stock
-        ).count()
-        out_of_stock = Product.query.filter(
-            Product.active == True,
-            Product.stock == 0
-        ).count()
-        
-        total_inventory_value = db.session.query(
-            func.sum(Product.stock * Product.cost)
-        ).filter_by(active=True).scalar() or 0
+        # Totales mantenidos en memoria, sin recorrer la tabla de productos
+        stats = inventory_stats.snapshot()
         
         recent_movements = InventoryMovement.query\
             .order_by(InventoryMovement.created_at.desc())\
@@ -697,12 +1737,7 @@ def get_general_stats():
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_products': total_products,
-                'low_stock_products': low_stock_products,
-                'out_of_stock': out_of_stock,
-                'total_inventory_value': float(total_inventory_value),
-            },
+            'stats': stats,
             'recent_movements': [m.to_dict() for m in recent_movements]
         }), 200
         
@@ -711,3 +1746,47 @@ def get_general_stats():
             'success': False,
             'message': f'Error al obtener estadísticas: {str(e)}'
         }), 500
+
+
+@barcode_bp.route('/api/stream/movements', methods=['GET'])
+def stream_movements():
+    """
+    Transmite por Server-Sent Events los movimientos, cambios de stock y
+    cruces del umbral de stock bajo a medida que se confirman.
+    Eventos: ``movement``, ``stock`` y ``low_stock``.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscriber = inventory_events.subscribe(last_event_id)
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Comentario SSE para mantener viva la conexión
+                    yield ': keep-alive\n\n'
+                    continue
+                yield inventory_events.format_sse(event)
+        finally:
+            inventory_events.unsubscribe(subscriber)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@barcode_bp.route('/api/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """Obtiene los contadores de las cachés de búsqueda y de imágenes"""
+    return jsonify({
+        'success': True,
+        'cache': product_cache.stats(),
+        'image_cache': image_cache.stats(),
+        'prefix_index': product_prefix_index.stats(),
+        'event_stream': inventory_events.stats(),
+        'inventory_stats': inventory_stats.stats(),
+        'code_index': code_index.stats()
+    }), 200
@@ -1,8 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from app.models.inventario_model import Producto, MovimientoInventario
+from app.services import inventario_listado, inventario_snapshots, valoracion, inventario_import, inventario_movimientos
 from app import db
 from datetime import datetime
-from sqlalchemy import or_
 
 inventario_bp = Blueprint('inventario', __name__, url_prefix='/inventario')
 
@@ -15,42 +15,59 @@ def listar_inventario():
     search = request.args.get('search', '')
     estado = request.args.get('estado', '')
     categoria = request.args.get('categoria', '')
+    nivel_stock = request.args.get('nivel_stock', '')
+    orden = request.args.get('orden', 'nombre')
+    direccion = request.args.get('direccion', 'asc')
+    cursor = request.args.get('cursor')
     
-    query = Producto.query
+    if orden not in inventario_listado.ORDENES:
+        orden = 'nombre'
+    if direccion not in ('asc', 'desc'):
+        direccion = 'asc'
     
-    if search:
-        query = query.filter(
-            or_(
-                Producto.codigo.like(f'%{search}%'),
-                Producto.nombre.like(f'%{search}%'),
-                Producto.descripcion.like(f'%{search}%')
-            )
+    try:
+        pagina = inventario_listado.listar_productos(
+            search=search,
+            estado=estado,
+            categoria=categoria,
+            nivel_stock=nivel_stock,
+            orden=orden,
+            direccion=direccion,
+            cursor=cursor,
+            limite=request.args.get('por_pagina', inventario_listado.POR_PAGINA, type=int)
         )
+    except ValueError:
+        flash('El enlace de paginación no es válido, se muestra la primera página.', 'warning')
+        return redirect(url_for('inventario.listar_inventario'))
     
-    if estado:
-        query = query.filter_by(estado=estado)
-    
-    if categoria:
-        query = query.filter_by(categoria=categoria)
-    
-    productos = query.order_by(Producto.nombre).all()
+    resumen = inventario_listado.resumen_stock()
     
-    total_productos = Producto.query.count()
-    stock_bajo = Producto.query.filter(Producto.cantidad <= 10, Producto.cantidad > 5).count()
-    stock_critico = Producto.query.filter(Producto.cantidad <= 5).count()
-    
-    categorias = db.session.query(Producto.categoria).distinct().all()
+    categorias = db.session.query(Producto.categoria).distinct().order_by(Producto.categoria).all()
     categorias = [c[0] for c in categorias if c[0]]
     
+    # Filtros activos para construir los enlaces de orden y paginación
+    filtros = {k: v for k, v in {
+        'search': search,
+        'estado': estado,
+        'categoria': categoria,
+        'nivel_stock': nivel_stock
+    }.items() if v}
+    
     return render_template('inventario/listar.html',
-                         productos=productos,
-                         total_productos=total_productos,
-                         stock_bajo=stock_bajo,
-                         stock_critico=stock_critico,
+                         productos=pagina['productos'],
+                         siguiente_cursor=pagina['siguiente_cursor'],
+                         es_primera_pagina=not cursor,
+                         total_productos=resumen['total_productos'],
+                         stock_bajo=resumen['stock_bajo'],
+                         stock_critico=resumen['stock_critico'],
                          categorias=categorias,
                          search=search,
                          estado_filtro=estado,
-                         categoria_filtro=categoria)
+                         categoria_filtro=categoria,
+                         nivel_stock_filtro=nivel_stock,
+                         orden=orden,
+                         direccion=direccion,
+                         filtros=filtros)
 
 @inventario_bp.route('/nuevo', methods=['GET', 'POST'])
 def nuevo_producto():
@@ -103,6 +120,7 @@ def nuevo_producto():
                     usuario=session.get('username')
                 )
                 db.session.add(movimiento)
+                valoracion.registrar_movimiento(movimiento, costo_unitario)
             
             db.session.commit()
             
@@ -116,6 +134,72 @@ def nuevo_producto():
     
     return render_template('inventario/nuevo.html')
 
+@inventario_bp.route('/importar', methods=['GET', 'POST'])
+def importar_inventario():
+    """
+    Carga o corrección masiva de productos desde CSV/XLSX. Con la opción
+    de vista previa solo se muestran las diferencias, sin guardar cambios.
+    """
+    if 'user_id' not in session:
+        flash('Debes iniciar sesión primero.', 'warning')
+        return redirect(url_for('auth.login'))
+    
+    resultado = None
+    
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        dry_run = request.form.get('dry_run') == '1'
+        
+        if not archivo or not archivo.filename:
+            flash('Selecciona un archivo CSV o XLSX.', 'warning')
+            return redirect(url_for('inventario.importar_inventario'))
+        
+        try:
+            resultado = inventario_import.importar_productos(
+                archivo,
+                usuario=session.get('username'),
+                dry_run=dry_run
+            )
+            if dry_run:
+                flash('Vista previa generada. No se guardaron cambios.', 'info')
+            else:
+                flash(f"Importación completada: {resultado['creados']} creados, "
+                      f"{resultado['actualizados']} actualizados.", 'success')
+                
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al importar: {str(e)}', 'danger')
+    
+    return render_template('inventario/importar.html', resultado=resultado)
+
+@inventario_bp.route('/api/importar', methods=['POST'])
+def api_importar_inventario():
+    """Versión JSON de la importación (``dry_run=1`` para la vista previa)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Debes iniciar sesión primero.'}), 401
+    
+    archivo = request.files.get('archivo') or request.files.get('file')
+    if not archivo or not archivo.filename:
+        return jsonify({'success': False, 'message': 'No se proporcionó un archivo'}), 400
+    
+    try:
+        resultado = inventario_import.importar_productos(
+            archivo,
+            usuario=session.get('username'),
+            dry_run=request.form.get('dry_run', request.args.get('dry_run')) in ('1', 'true')
+        )
+        return jsonify({'success': True, **resultado}), 200
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Error al importar: {str(e)}'}), 500
+
 @inventario_bp.route('/editar/<int:id>', methods=['GET', 'POST'])
 def editar_producto(id):
     if 'user_id' not in session:
@@ -133,7 +217,7 @@ def editar_producto(id):
             producto.serial = request.form.get('serial')
             producto.costo_unitario = float(request.form.get('costo_unitario'))
             producto.cantidad = int(request.form.get('cantidad'))
-            producto.estado = request.form.get('estado')
+            producto.estado = request.form.get('estado', 'disponible')
             producto.categoria = request.form.get('categoria')
             
             if cantidad_anterior != producto.cantidad:
@@ -149,6 +233,7 @@ def editar_producto(id):
                     usuario=session.get('username')
                 )
                 db.session.add(movimiento)
+                valoracion.registrar_movimiento(movimiento)
             
             db.session.commit()
             flash('Producto actualizado exitosamente.', 'success')
@@ -167,7 +252,9 @@ def detalle_producto(id):
         return redirect(url_for('auth.login'))
     
     producto = Producto.query.get_or_404(id)
-    movimientos = MovimientoInventario.query.filter_by(producto_id=id).order_by(MovimientoInventario.fecha.desc()).limit(20).all()
+    movimientos = MovimientoInventario.query.filter_by(producto_id=id)\
+        .order_by(MovimientoInventario.fecha.desc(), MovimientoInventario.id.desc())\
+        .limit(20).all()
     
     return render_template('inventario/detalle.html', producto=producto, movimientos=movimientos)
 
@@ -222,9 +309,62 @@ def historial_movimientos():
         flash('Debes iniciar sesión primero.', 'warning')
         return redirect(url_for('auth.login'))
     
-    movimientos = MovimientoInventario.query.order_by(MovimientoInventario.fecha.desc()).limit(100).all()
+    filtros = {k: v for k, v in {
+        'producto_id': request.args.get('producto_id', type=int),
+        'tipo': request.args.get('tipo', ''),
+        'usuario': request.args.get('usuario', '').strip(),
+        'desde': request.args.get('desde', ''),
+        'hasta': request.args.get('hasta', '')
+    }.items() if v}
+    cursor = request.args.get('cursor')
+    
+    try:
+        pagina = inventario_movimientos.listar_movimientos(cursor=cursor, **filtros)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('inventario.historial_movimientos'))
+    
+    producto = Producto.query.get(filtros['producto_id']) if 'producto_id' in filtros else None
     
-    return render_template('inventario/movimientos.html', movimientos=movimientos)
+    return render_template('inventario/movimientos.html',
+                         movimientos=pagina['movimientos'],
+                         siguiente_cursor=pagina['siguiente_cursor'],
+                         es_primera_pagina=not cursor,
+                         producto=producto,
+                         tipos=inventario_movimientos.TIPOS_MOVIMIENTO,
+                         filtros=filtros,
+                         filtros_sin_producto={k: v for k, v in filtros.items() if k != 'producto_id'})
+
+@inventario_bp.route('/api/movimientos', methods=['GET'])
+def api_movimientos():
+    """
+    Historial de movimientos en JSON con filtros ``producto_id``, ``tipo``,
+    ``usuario``, ``desde`` y ``hasta``, paginado con ``cursor``.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Debes iniciar sesión primero.'}), 401
+    
+    try:
+        pagina = inventario_movimientos.listar_movimientos(
+            producto_id=request.args.get('producto_id', type=int),
+            tipo=request.args.get('tipo', ''),
+            usuario=request.args.get('usuario', '').strip(),
+            desde=request.args.get('desde', ''),
+            hasta=request.args.get('hasta', ''),
+            cursor=request.args.get('cursor'),
+            limite=request.args.get('limit', inventario_movimientos.POR_PAGINA, type=int)
+        )
+        return jsonify({
+            'success': True,
+            'movimientos': [m.to_dict() for m in pagina['movimientos']],
+            'next_cursor': pagina['siguiente_cursor'],
+            'has_more': pagina['hay_mas']
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error al obtener movimientos: {str(e)}'}), 500
 
 @inventario_bp.route('/reporte', methods=['GET'])
 def reporte_inventario():
@@ -236,4 +376,44 @@ def reporte_inventario():
     total_productos = len(productos)
     total_stock = sum(p.cantidad for p in productos)
     
-    return render_template('inventario/reporte.html', productos=productos, total_productos=total_productos, total_stock=total_stock)
\ No newline at end of file
+    return render_template('inventario/reporte.html', productos=productos, total_productos=total_productos, total_stock=total_stock)
+
+@inventario_bp.route('/api/stock', methods=['GET'])
+def api_stock_a_fecha():
+    """
+    Stock de un producto (``producto_id``) o de todo el catálogo en la
+    fecha indicada (``fecha``: AAAA-MM-DD para el cierre del día o
+    AAAA-MM-DDTHH:MM en UTC; por defecto, ahora).
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Debes iniciar sesión primero.'}), 401
+    
+    try:
+        resultado = inventario_snapshots.stock_a_fecha(
+            request.args.get('fecha', ''),
+            producto_id=request.args.get('producto_id', type=int)
+        )
+        return jsonify({'success': True, **resultado}), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error al calcular el stock: {str(e)}'}), 500
+
+@inventario_bp.route('/api/valoracion', methods=['GET'])
+def api_valoracion():
+    """
+    Valorización del inventario por promedio ponderado o FIFO
+    (``metodo``), leída de los saldos que se actualizan con cada movimiento.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Debes iniciar sesión primero.'}), 401
+    
+    try:
+        resultado = valoracion.reporte_valoracion(request.args.get('metodo'))
+        return jsonify({'success': True, **resultado}), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error al valorizar el inventario: {str(e)}'}), 500
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file
 from app.models.venta_model import Venta, Cliente, DetalleVenta
 from app.models.inventario_model import Producto, MovimientoInventario
+from app.services import valoracion
 from app import db
 from datetime import datetime
 from io import BytesIO
@@ -141,6 +142,7 @@ def nueva_venta():
                     usuario=session.get('username')
                 )
                 db.session.add(movimiento)
+                valoracion.registrar_movimiento(movimiento)
             
             db.session.commit()
             
@@ -194,6 +196,11 @@ def anular_venta(id):
                 usuario=session.get('username')
             )
             db.session.add(movimiento)
+            # Las unidades devueltas reingresan al costo con que salieron
+            valoracion.registrar_movimiento(
+                movimiento,
+                valoracion.costo_de_movimiento(producto.id, f'Venta {venta.numero_factura}')
+            )
         
         venta.estado = 'anulada'
         db.session.commit()
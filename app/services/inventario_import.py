@@ -0,0 +1,219 @@
+from app import db
+from app.models.inventario_model import Producto, MovimientoInventario
+from app.services import valoracion
+from app.utils.tabular_reader import iter_table_rows, iter_chunks, parse_number, parse_integer
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Filas de diferencias que se incluyen en el resultado
+MAX_DIFERENCIAS = 1000
+
+ESTADOS = ('disponible', 'prestado', 'dañado', 'inactivo')
+
+# Campos de texto que se pueden cargar o corregir desde el archivo
+CAMPOS_TEXTO = ('nombre', 'descripcion', 'referencia', 'codigo_interno', 'codigo_equipo',
+                'serial', 'estado', 'categoria')
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    return str(valor).strip() if valor not in (None, '') else ''
+
+
+def _parse_fila(fila):
+    """
+    Convierte una fila del archivo en los valores a cargar. Las celdas
+    vacías no se incluyen, así que no modifican al producto existente.
+
+    Raises:
+        ValueError: Si falta el código o hay valores inválidos
+    """
+    codigo = _texto(fila, 'codigo')
+    if not codigo:
+        raise ValueError('El campo codigo es requerido')
+
+    valores = {'codigo': codigo}
+    for campo in CAMPOS_TEXTO:
+        valor = _texto(fila, campo)
+        if valor:
+            valores[campo] = valor
+
+    if 'estado' in valores and valores['estado'] not in ESTADOS:
+        raise ValueError(f'Estado inválido: {valores["estado"]}. Use: {", ".join(ESTADOS)}')
+
+    try:
+        if _texto(fila, 'costo_unitario'):
+            valores['costo_unitario'] = parse_number(_texto(fila, 'costo_unitario'))
+        if _texto(fila, 'cantidad'):
+            valores['cantidad'] = parse_integer(_texto(fila, 'cantidad'))
+    except (ValueError, OverflowError):
+        raise ValueError('Valores numéricos inválidos en costo_unitario o cantidad')
+
+    if valores.get('cantidad', 0) < 0:
+        raise ValueError('La cantidad no puede ser negativa')
+    if valores.get('costo_unitario', 0) < 0:
+        raise ValueError('El costo unitario no puede ser negativo')
+
+    return valores
+
+
+def importar_productos(file_storage, usuario, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Carga o corrige productos desde CSV/XLSX por bloques, identificándolos
+    por ``codigo``.
+
+    Por bloque se hace una sola consulta de los productos existentes, se
+    calcula en una pasada la diferencia de cantidad contra el stock actual y
+    se insertan juntos los productos nuevos y sus movimientos (``entrada``
+    para productos nuevos, ``ajuste`` para cambios de cantidad), que quedan
+    valorizados en la misma transacción. Cada bloque se confirma por separado.
+
+    Con ``dry_run`` no se escribe nada y se retorna la vista previa de los cambios.
+
+    Args:
+        file_storage: Archivo subido
+        usuario (str): Usuario que realiza la importación
+        dry_run (bool): Solo calcular las diferencias
+        chunk_size (int): Filas por bloque
+
+    Returns:
+        dict: Totales, diferencias por fila y errores
+    """
+    creados = 0
+    actualizados = 0
+    sin_cambios = 0
+    movimientos_creados = 0
+    errores = []
+    diferencias = []
+    total_diferencias = 0
+    vistos = set()
+
+    for bloque in iter_chunks(iter_table_rows(file_storage), chunk_size):
+        validas = []
+        for numero_fila, fila in bloque:
+            try:
+                valores = _parse_fila(fila)
+            except ValueError as e:
+                errores.append({'fila': numero_fila, 'error': str(e)})
+                continue
+            if valores['codigo'] in vistos:
+                errores.append({'fila': numero_fila, 'codigo': valores['codigo'],
+                                'error': 'Código duplicado en el archivo'})
+                continue
+            vistos.add(valores['codigo'])
+            validas.append((numero_fila, valores))
+
+        if not validas:
+            continue
+
+        # Productos existentes del bloque con una sola consulta
+        existentes = Producto.query.filter(Producto.codigo.in_([v['codigo'] for _, v in validas]))
+        if not dry_run:
+            existentes = existentes.order_by(Producto.id).with_for_update()
+        existentes = {p.codigo: p for p in existentes}
+
+        nuevos = []
+        ajustes = []
+        for numero_fila, valores in validas:
+            producto = existentes.get(valores['codigo'])
+
+            if producto is None:
+                if 'nombre' not in valores:
+                    errores.append({'fila': numero_fila, 'codigo': valores['codigo'],
+                                    'error': 'El campo nombre es requerido para productos nuevos'})
+                    continue
+                cantidad = valores.get('cantidad', 0)
+                diferencia = {
+                    'fila': numero_fila,
+                    'codigo': valores['codigo'],
+                    'accion': 'crear',
+                    'cambios': {k: [None, v] for k, v in valores.items() if k != 'codigo'}
+                }
+                if cantidad > 0:
+                    diferencia['movimiento'] = {'tipo': 'entrada', 'cantidad_anterior': 0, 'cantidad_nueva': cantidad}
+                nuevos.append((valores, cantidad))
+            else:
+                cambios = {
+                    campo: [getattr(producto, campo), valor]
+                    for campo, valor in valores.items()
+                    if campo != 'codigo' and getattr(producto, campo) != valor
+                }
+                if not cambios:
+                    sin_cambios += 1
+                    continue
+                diferencia = {
+                    'fila': numero_fila,
+                    'codigo': valores['codigo'],
+                    'accion': 'actualizar',
+                    'cambios': cambios
+                }
+                if 'cantidad' in cambios:
+                    anterior, nueva = cambios['cantidad']
+                    diferencia['movimiento'] = {'tipo': 'ajuste', 'cantidad_anterior': anterior or 0,
+                                                'cantidad_nueva': nueva}
+                ajustes.append((producto, cambios))
+
+            total_diferencias += 1
+            if len(diferencias) < MAX_DIFERENCIAS:
+                diferencias.append(diferencia)
+
+        if not dry_run and (nuevos or ajustes):
+            movimientos = []
+            costos = []
+
+            productos_nuevos = [Producto(**valores) for valores, _ in nuevos]
+            db.session.add_all(productos_nuevos)
+
+            for producto, cambios in ajustes:
+                anterior = producto.cantidad or 0
+                for campo, (_, valor) in cambios.items():
+                    setattr(producto, campo, valor)
+                if 'cantidad' in cambios:
+                    movimientos.append(MovimientoInventario(
+                        producto=producto,
+                        tipo='ajuste',
+                        cantidad=abs(producto.cantidad - anterior),
+                        cantidad_anterior=anterior,
+                        cantidad_nueva=producto.cantidad,
+                        motivo='Ajuste por importación',
+                        usuario=usuario
+                    ))
+                    costos.append(None)
+
+            for producto, (valores, cantidad) in zip(productos_nuevos, nuevos):
+                if cantidad > 0:
+                    movimientos.append(MovimientoInventario(
+                        producto=producto,
+                        tipo='entrada',
+                        cantidad=cantidad,
+                        cantidad_anterior=0,
+                        cantidad_nueva=cantidad,
+                        motivo='Ingreso inicial (importación)',
+                        usuario=usuario
+                    ))
+                    costos.append(producto.costo_unitario or 0)
+
+            # Inserciones y actualizaciones del bloque en lotes (executemany)
+            db.session.add_all(movimientos)
+            db.session.flush()
+            valoracion.registrar_movimientos(movimientos, costos)
+            db.session.commit()
+            db.session.expunge_all()
+            movimientos_creados += len(movimientos)
+
+        creados += len(nuevos)
+        actualizados += len(ajustes)
+
+    errores.sort(key=lambda e: e['fila'])
+    return {
+        'dry_run': dry_run,
+        'creados': creados,
+        'actualizados': actualizados,
+        'sin_cambios': sin_cambios,
+        'movimientos': movimientos_creados,
+        'fallidos': len(errores),
+        'errores': errores,
+        'diferencias': diferencias,
+        'diferencias_truncadas': total_diferencias > len(diferencias)
+    }
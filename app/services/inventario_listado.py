@@ -0,0 +1,130 @@
+from app import db
+from app.models.inventario_model import Producto
+from app.services.product_search import is_postgres
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.text import escape_like, normalize_text
+from sqlalchemy import case, func, text, tuple_
+
+
+# Columnas por las que se puede ordenar el listado. Las NOT NULL se usan
+# tal cual para que los índices (columna, id) sirvan el orden y el cursor;
+# las opcionales ordenan NULL como vacío (comparación de cursor válida) y
+# tienen índices sobre la misma expresión en el modelo.
+ORDENES = {
+    'nombre': Producto.nombre,
+    'referencia': func.coalesce(Producto.referencia, ''),
+    'codigo_interno': func.coalesce(Producto.codigo_interno, ''),
+    'codigo_equipo': func.coalesce(Producto.codigo_equipo, ''),
+    'cantidad': Producto.cantidad,
+    'costo_unitario': Producto.costo_unitario,
+    'estado': Producto.estado,
+}
+
+NIVELES_STOCK = ('suficiente', 'bajo', 'critico')
+
+POR_PAGINA = 50
+MAX_POR_PAGINA = 200
+
+
+def ensure_inventario_search(chunk_size=1000):
+    """
+    Completa la columna ``busqueda`` de los productos que aún no la tienen
+    y, en Postgres, crea el índice trigram que acelera ``LIKE '%texto%'``.
+
+    Returns:
+        int: Productos actualizados
+    """
+    actualizados = 0
+    while True:
+        productos = Producto.query.filter(Producto.busqueda.is_(None))\
+            .order_by(Producto.id)\
+            .limit(chunk_size)\
+            .all()
+        if not productos:
+            break
+        for producto in productos:
+            # Vacío en lugar de NULL para no volver a procesarlo
+            producto.busqueda = producto.texto_busqueda() or ''
+        db.session.commit()
+        actualizados += len(productos)
+
+    if is_postgres():
+        with db.engine.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            conn.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_productos_busqueda_trgm '
+                'ON productos USING gin (busqueda gin_trgm_ops)'
+            ))
+
+    return actualizados
+
+
+def filtrar_productos(query, search='', estado='', categoria='', nivel_stock=''):
+    """Aplica los filtros del listado de inventario a una consulta de Producto"""
+    search = normalize_text(search)
+    if search:
+        query = query.filter(Producto.busqueda.like(f'%{escape_like(search)}%', escape='\\'))
+    if estado:
+        query = query.filter(Producto.estado == estado)
+    if categoria:
+        query = query.filter(Producto.categoria == categoria)
+    if nivel_stock in NIVELES_STOCK:
+        query = query.filter(Producto.nivel_stock == nivel_stock)
+    return query
+
+
+def listar_productos(search='', estado='', categoria='', nivel_stock='',
+                     orden='nombre', direccion='asc', cursor=None, limite=POR_PAGINA):
+    """
+    Página del listado de inventario ordenada por ``orden`` y paginada por
+    cursor sobre (columna de orden, id), sin OFFSET.
+
+    Returns:
+        dict: Productos de la página y cursor de la siguiente (o None)
+    """
+    limite = max(1, min(int(limite), MAX_POR_PAGINA))
+    columna = ORDENES.get(orden, ORDENES['nombre'])
+    descendente = direccion == 'desc'
+
+    query = filtrar_productos(Producto.query, search, estado, categoria, nivel_stock)
+
+    if cursor:
+        ultimo_valor, ultimo_id = decode_cursor(cursor)
+        clave = tuple_(columna, Producto.id)
+        ultimo = tuple_(ultimo_valor, ultimo_id)
+        query = query.filter(clave < ultimo if descendente else clave > ultimo)
+
+    if descendente:
+        query = query.order_by(columna.desc(), Producto.id.desc())
+    else:
+        query = query.order_by(columna, Producto.id)
+
+    productos = query.add_columns(columna.label('valor_orden')).limit(limite + 1).all()
+
+    hay_mas = len(productos) > limite
+    productos = productos[:limite]
+
+    siguiente_cursor = None
+    if hay_mas and productos:
+        ultimo_producto, ultimo_valor = productos[-1]
+        siguiente_cursor = encode_cursor([ultimo_valor, ultimo_producto.id])
+
+    return {
+        'productos': [producto for producto, _ in productos],
+        'siguiente_cursor': siguiente_cursor,
+        'hay_mas': hay_mas
+    }
+
+
+def resumen_stock():
+    """Totales del inventario por nivel de stock en una sola consulta"""
+    total, bajo, critico = db.session.query(
+        func.count(Producto.id),
+        func.coalesce(func.sum(case((Producto.nivel_stock == 'bajo', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Producto.nivel_stock == 'critico', 1), else_=0)), 0)
+    ).one()
+    return {
+        'total_productos': total,
+        'stock_bajo': int(bajo),
+        'stock_critico': int(critico)
+    }
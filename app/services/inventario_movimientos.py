@@ -0,0 +1,133 @@
+from datetime import date, datetime, timedelta
+from app import db
+from app.models.inventario_model import MovimientoInventario
+from app.utils.cursor import encode_cursor, decode_cursor
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import joinedload
+
+
+TIPOS_MOVIMIENTO = ('entrada', 'salida', 'ajuste', 'prestamo')
+
+POR_PAGINA = 50
+MAX_POR_PAGINA = 500
+
+
+def _parse_fecha(valor, fin_del_dia=False):
+    """
+    Convierte ``AAAA-MM-DD`` o ``AAAA-MM-DDTHH:MM`` en datetime (UTC).
+    Con ``fin_del_dia`` una fecha sin hora se toma hasta el final de ese día.
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    valor = (valor or '').strip()
+    if not valor:
+        return None
+    try:
+        if len(valor) == 10:
+            dia = date.fromisoformat(valor)
+            if fin_del_dia:
+                dia += timedelta(days=1)
+            return datetime.combine(dia, datetime.min.time())
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f'Fecha inválida: {valor}. Use AAAA-MM-DD o AAAA-MM-DDTHH:MM')
+
+
+def _nulos_primero():
+    """
+    Posición de ``fecha`` NULL al ordenar DESC según la base de datos:
+    Postgres los pone primero, MySQL y SQLite al final. Se respeta el orden
+    nativo para que el recorrido siga usando los índices (..., fecha, id).
+    """
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _despues_del_cursor(cursor):
+    """
+    Condición de los movimientos posteriores al cursor en el orden
+    (fecha DESC, id DESC), contemplando movimientos antiguos sin fecha.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        ultima_fecha, ultimo_id = decode_cursor(cursor)
+        ultima_fecha = datetime.fromisoformat(ultima_fecha) if ultima_fecha is not None else None
+        ultimo_id = int(ultimo_id)
+    except (TypeError, ValueError):
+        raise ValueError('Cursor inválido')
+
+    fecha, id_ = MovimientoInventario.fecha, MovimientoInventario.id
+    if ultima_fecha is None:
+        sin_fecha = and_(fecha.is_(None), id_ < ultimo_id)
+        # Con NULL primero, después vienen todos los que tienen fecha
+        return or_(sin_fecha, fecha.isnot(None)) if _nulos_primero() else sin_fecha
+
+    con_fecha = tuple_(fecha, id_) < tuple_(ultima_fecha, ultimo_id)
+    # Con NULL al final, todavía faltan los movimientos sin fecha
+    return con_fecha if _nulos_primero() else or_(con_fecha, fecha.is_(None))
+
+
+def listar_movimientos(producto_id=None, tipo='', usuario='', desde='', hasta='',
+                       cursor=None, limite=POR_PAGINA):
+    """
+    Historial de movimientos del más reciente al más antiguo, paginado por
+    cursor sobre (fecha, id). Cada filtro tiene un índice compuesto que
+    termina en (fecha, id), así que una página cuesta lo mismo con miles o
+    millones de movimientos.
+
+    Args:
+        producto_id (int): Movimientos de un producto
+        tipo (str): entrada, salida, ajuste o prestamo
+        usuario (str): Usuario que registró el movimiento
+        desde (str): Fecha inicial (incluida)
+        hasta (str): Fecha final (AAAA-MM-DD incluye todo ese día)
+        cursor (str): Cursor devuelto por la página anterior
+        limite (int): Movimientos por página (máximo MAX_POR_PAGINA)
+
+    Returns:
+        dict: Movimientos de la página y cursor siguiente (o None)
+
+    Raises:
+        ValueError: Si una fecha o el cursor no son válidos
+    """
+    limite = max(1, min(int(limite), MAX_POR_PAGINA))
+
+    query = MovimientoInventario.query.options(joinedload(MovimientoInventario.producto))
+
+    if producto_id:
+        query = query.filter(MovimientoInventario.producto_id == producto_id)
+    if tipo:
+        query = query.filter(MovimientoInventario.tipo == tipo)
+    if usuario:
+        query = query.filter(MovimientoInventario.usuario == usuario)
+
+    fecha_desde = _parse_fecha(desde)
+    fecha_hasta = _parse_fecha(hasta, fin_del_dia=True)
+    if fecha_desde:
+        query = query.filter(MovimientoInventario.fecha >= fecha_desde)
+    if fecha_hasta:
+        query = query.filter(MovimientoInventario.fecha < fecha_hasta)
+
+    if cursor:
+        query = query.filter(_despues_del_cursor(cursor))
+
+    movimientos = query.order_by(
+        MovimientoInventario.fecha.desc(),
+        MovimientoInventario.id.desc()
+    ).limit(limite + 1).all()
+
+    hay_mas = len(movimientos) > limite
+    movimientos = movimientos[:limite]
+
+    siguiente_cursor = None
+    if hay_mas and movimientos:
+        ultimo = movimientos[-1]
+        siguiente_cursor = encode_cursor([ultimo.fecha.isoformat() if ultimo.fecha else None, ultimo.id])
+
+    return {
+        'movimientos': movimientos,
+        'siguiente_cursor': siguiente_cursor,
+        'hay_mas': hay_mas
+    }
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from app import db
+from app.models.inventario_model import Producto, MovimientoInventario, SnapshotInventario
+from sqlalchemy import func, insert, or_
+from sqlalchemy.exc import IntegrityError
+
+
+logger = logging.getLogger(__name__)
+
+# Hora (UTC) a la que se toma el snapshot del día anterior
+SNAPSHOT_HORA = int(os.getenv('INVENTARIO_SNAPSHOT_HORA', 0))
+SNAPSHOT_MINUTO = int(os.getenv('INVENTARIO_SNAPSHOT_MINUTO', 15))
+
+SNAPSHOT_CHUNK_SIZE = 1000
+
+
+def cierre_del_dia(fecha):
+    """Instante (UTC) al que corresponde el snapshot de ``fecha``"""
+    return datetime.combine(fecha + timedelta(days=1), datetime.min.time())
+
+
+def _deltas(desde, hasta=None, producto_id=None):
+    """
+    Cambio neto de cantidad por producto de los movimientos con
+    ``desde <= fecha < hasta``, en una sola consulta agrupada.
+    """
+    query = db.session.query(
+        MovimientoInventario.producto_id,
+        func.sum(MovimientoInventario.cantidad_nueva - MovimientoInventario.cantidad_anterior)
+    ).filter(MovimientoInventario.fecha >= desde)
+    if hasta is not None:
+        query = query.filter(MovimientoInventario.fecha < hasta)
+    if producto_id is not None:
+        query = query.filter(MovimientoInventario.producto_id == producto_id)
+    return {pid: int(delta or 0) for pid, delta in query.group_by(MovimientoInventario.producto_id)}
+
+
+def tomar_snapshot(fecha=None):
+    """
+    Guarda la cantidad y el valor de todos los productos al cierre de
+    ``fecha`` (por defecto ayer). Como se ejecuta después del cierre, a la
+    cantidad actual se le descuentan los movimientos posteriores.
+
+    Returns:
+        int: Filas escritas (0 si el snapshot ya existía)
+    """
+    fecha = fecha or (datetime.utcnow().date() - timedelta(days=1))
+
+    if SnapshotInventario.query.filter_by(fecha=fecha).first() is not None:
+        return 0
+
+    cierre = cierre_del_dia(fecha)
+    posteriores = _deltas(cierre)
+    ahora = datetime.utcnow()
+
+    escritas = 0
+    ultimo_id = 0
+    try:
+        while True:
+            productos = db.session.query(Producto.id, Producto.cantidad, Producto.costo_unitario)\
+                .filter(Producto.id > ultimo_id)\
+                .filter(or_(Producto.fecha_ingreso.is_(None), Producto.fecha_ingreso < cierre))\
+                .order_by(Producto.id)\
+                .limit(SNAPSHOT_CHUNK_SIZE)\
+                .all()
+            if not productos:
+                break
+
+            filas = []
+            for producto_id, cantidad, costo in productos:
+                cantidad = (cantidad or 0) - posteriores.get(producto_id, 0)
+                filas.append({
+                    'fecha': fecha,
+                    'producto_id': producto_id,
+                    'cantidad': cantidad,
+                    'costo_unitario': costo or 0,
+                    'valor': cantidad * (costo or 0),
+                    'creado': ahora
+                })
+            db.session.execute(insert(SnapshotInventario), filas)
+            escritas += len(filas)
+            ultimo_id = productos[-1][0]
+
+        db.session.commit()
+    except IntegrityError:
+        # Otro proceso escribió el mismo snapshot
+        db.session.rollback()
+        return 0
+
+    return escritas
+
+
+def _parse_momento(valor):
+    """
+    Convierte ``AAAA-MM-DD`` (cierre de ese día) o ``AAAA-MM-DDTHH:MM[:SS]``
+    en un instante UTC.
+
+    Raises:
+        ValueError: Si el formato no es válido
+    """
+    valor = (valor or '').strip()
+    if not valor:
+        return datetime.utcnow()
+    try:
+        if len(valor) == 10:
+            return cierre_del_dia(date.fromisoformat(valor))
+        momento = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f'Fecha inválida: {valor}. Use AAAA-MM-DD o AAAA-MM-DDTHH:MM')
+    # Las fechas se guardan en UTC sin zona horaria
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc).replace(tzinfo=None)
+    return momento
+
+
+def stock_a_fecha(momento, producto_id=None):
+    """
+    Cantidad y valor de uno o todos los productos en ``momento``.
+
+    Se parte del punto de referencia más cercano (el snapshot anterior, el
+    siguiente o el stock actual) y se aplican solo los movimientos entre ese
+    punto y ``momento``, sin recorrer todo el historial.
+
+    Args:
+        momento (datetime|str): Instante UTC o texto AAAA-MM-DD[THH:MM]
+        producto_id (int): Limitar a un producto
+
+    Returns:
+        dict: Base usada y lista de productos con cantidad y valor
+    """
+    if not isinstance(momento, datetime):
+        momento = _parse_momento(momento)
+    ahora = datetime.utcnow()
+    momento = min(momento, ahora)
+
+    snapshots = db.session.query(SnapshotInventario.fecha)
+    if producto_id is not None:
+        snapshots = snapshots.filter(SnapshotInventario.producto_id == producto_id)
+    anterior = snapshots.filter(SnapshotInventario.fecha < momento.date())\
+        .order_by(SnapshotInventario.fecha.desc()).limit(1).scalar()
+    siguiente = snapshots.filter(SnapshotInventario.fecha >= momento.date())\
+        .order_by(SnapshotInventario.fecha).limit(1).scalar()
+
+    # Punto de referencia más cercano: (distancia, fecha del snapshot o None = actual)
+    candidatos = [(ahora - momento, None)]
+    if anterior is not None:
+        candidatos.append((momento - cierre_del_dia(anterior), anterior))
+    if siguiente is not None:
+        candidatos.append((cierre_del_dia(siguiente) - momento, siguiente))
+    _, base = min(candidatos, key=lambda c: c[0])
+
+    productos = db.session.query(Producto.id, Producto.codigo, Producto.nombre,
+                                 Producto.cantidad, Producto.costo_unitario)\
+        .filter(or_(Producto.fecha_ingreso.is_(None), Producto.fecha_ingreso <= momento))
+    if producto_id is not None:
+        productos = productos.filter(Producto.id == producto_id)
+    productos = productos.order_by(Producto.id).all()
+
+    if base is None:
+        base_cantidad = {p.id: (p.cantidad or 0, p.costo_unitario or 0) for p in productos}
+        deltas = {pid: -delta for pid, delta in _deltas(momento, producto_id=producto_id).items()}
+    else:
+        filas = db.session.query(SnapshotInventario.producto_id, SnapshotInventario.cantidad,
+                                 SnapshotInventario.costo_unitario)\
+            .filter(SnapshotInventario.fecha == base)
+        if producto_id is not None:
+            filas = filas.filter(SnapshotInventario.producto_id == producto_id)
+        base_cantidad = {pid: (cantidad, costo) for pid, cantidad, costo in filas}
+
+        cierre = cierre_del_dia(base)
+        if cierre <= momento:
+            deltas = _deltas(cierre, momento, producto_id)
+        else:
+            deltas = {pid: -delta for pid, delta in _deltas(momento, cierre, producto_id).items()}
+
+    resultado = []
+    for p in productos:
+        # Productos creados después del snapshot parten de cero
+        cantidad, costo = base_cantidad.get(p.id, (0, p.costo_unitario or 0))
+        cantidad += deltas.get(p.id, 0)
+        resultado.append({
+            'producto_id': p.id,
+            'codigo': p.codigo,
+            'nombre': p.nombre,
+            'cantidad': cantidad,
+            'costo_unitario': costo,
+            'valor': round(cantidad * costo, 2)
+        })
+
+    return {
+        'momento': momento.isoformat(),
+        'base': base.isoformat() if base else 'actual',
+        'productos': resultado,
+        'valor_total': round(sum(r['valor'] for r in resultado), 2)
+    }
+
+
+def iniciar_programador(app):
+    """
+    Inicia un hilo que toma cada día, a SNAPSHOT_HORA:SNAPSHOT_MINUTO UTC,
+    el snapshot del día anterior. Al arrancar recupera el de ayer si falta.
+    Con varios procesos la restricción única evita snapshots duplicados.
+    """
+    def ejecutar():
+        try:
+            with app.app_context():
+                escritas = tomar_snapshot()
+                if escritas:
+                    logger.info('Snapshot de inventario guardado: %s productos', escritas)
+        except Exception:
+            logger.exception('Error al tomar el snapshot de inventario')
+
+    def run():
+        ejecutar()
+        while True:
+            ahora = datetime.utcnow()
+            siguiente = ahora.replace(hour=SNAPSHOT_HORA, minute=SNAPSHOT_MINUTO, second=0, microsecond=0)
+            if siguiente <= ahora:
+                siguiente += timedelta(days=1)
+            time.sleep((siguiente - ahora).total_seconds())
+            ejecutar()
+
+    hilo = threading.Thread(target=run, name='inventario-snapshots', daemon=True)
+    hilo.start()
+    return hilo
@@ -0,0 +1,185 @@
+from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.barcode import createBarcodeDrawing
+from reportlab.graphics.barcode.qr import QrCodeWidget
+
+
+PAGE_SIZES = {
+    'letter': letter,
+    'a4': A4,
+}
+
+# ReportLab conserva todas las páginas del documento en memoria hasta
+# save(), así que el tamaño de una hoja se limita para acotar la memoria
+MAX_SHEET_LABELS = 3000
+
+
+class LabelSheetLayout:
+    """
+    Distribución de una hoja de etiquetas (filas, columnas y márgenes en mm).
+    Los valores por defecto corresponden a hojas carta de 3x10 etiquetas.
+    """
+
+    DEFAULTS = {
+        'page_size': 'letter',
+        'rows': 10,
+        'columns': 3,
+        'margin_top': 12.7,
+        'margin_bottom': 12.7,
+        'margin_left': 4.8,
+        'margin_right': 4.8,
+        'h_gap': 3.2,
+        'v_gap': 0.0,
+    }
+
+    def __init__(self, **options):
+        values = dict(self.DEFAULTS)
+        values.update({k: v for k, v in options.items() if k in self.DEFAULTS and v is not None})
+
+        page_size = str(values['page_size']).lower()
+        if page_size not in PAGE_SIZES:
+            raise ValueError(f'Tamaño de página no soportado: {values["page_size"]}')
+
+        self.page_size = PAGE_SIZES[page_size]
+        self.rows = int(values['rows'])
+        self.columns = int(values['columns'])
+        self.margin_top = float(values['margin_top']) * mm
+        self.margin_bottom = float(values['margin_bottom']) * mm
+        self.margin_left = float(values['margin_left']) * mm
+        self.margin_right = float(values['margin_right']) * mm
+        self.h_gap = float(values['h_gap']) * mm
+        self.v_gap = float(values['v_gap']) * mm
+
+        if self.rows < 1 or self.columns < 1:
+            raise ValueError('Filas y columnas deben ser mayores a 0')
+
+        page_width, page_height = self.page_size
+        usable_width = page_width - self.margin_left - self.margin_right
+        usable_height = page_height - self.margin_top - self.margin_bottom
+        self.label_width = (usable_width - self.h_gap * (self.columns - 1)) / self.columns
+        self.label_height = (usable_height - self.v_gap * (self.rows - 1)) / self.rows
+
+        if self.label_width <= 0 or self.label_height <= 0:
+            raise ValueError('Los márgenes no dejan espacio para las etiquetas')
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**(data or {}))
+
+    @property
+    def labels_per_page(self):
+        return self.rows * self.columns
+
+    def label_origin(self, slot):
+        """Retorna la esquina inferior izquierda de la posición ``slot`` de la página"""
+        row, column = divmod(slot, self.columns)
+        page_height = self.page_size[1]
+        x = self.margin_left + column * (self.label_width + self.h_gap)
+        y = page_height - self.margin_top - (row + 1) * self.label_height - row * self.v_gap
+        return x, y
+
+
+def _barcode_drawing(code):
+    """Crea un dibujo vectorial del código (EAN-13 si es numérico de 13 dígitos)"""
+    if len(code) == 13 and code.isdigit():
+        # El widget EAN-13 calcula el dígito de verificación a partir de 12 dígitos
+        return createBarcodeDrawing('EAN13', value=code[:12], humanReadable=True)
+    return createBarcodeDrawing('Code128', value=code, humanReadable=True)
+
+
+def _draw_scaled(pdf, drawing, x, y, max_width, max_height):
+    """Dibuja ``drawing`` escalado proporcionalmente dentro de la caja dada"""
+    scale = min(max_width / drawing.width, max_height / drawing.height)
+    pdf.saveState()
+    pdf.translate(x, y)
+    pdf.scale(scale, scale)
+    renderPDF.draw(drawing, pdf, 0, 0)
+    pdf.restoreState()
+    return drawing.width * scale, drawing.height * scale
+
+
+def _draw_label(pdf, product_data, x, y, layout, include_qr):
+    width, height = layout.label_width, layout.label_height
+    padding = min(width, height) * 0.06
+
+    # Nombre del producto
+    name_size = max(6, min(10, height * 0.12))
+    pdf.setFont('Helvetica-Bold', name_size)
+    name = (product_data.get('name') or 'Producto')[:40]
+    text_y = y + height - padding - name_size
+    pdf.drawString(x + padding, text_y, name)
+
+    # SKU y precio
+    info_items = []
+    if product_data.get('sku'):
+        info_items.append(f"SKU: {product_data['sku']}")
+    if product_data.get('price'):
+        info_items.append(f"${product_data['price']:,.2f}")
+
+    info_size = max(5, name_size - 2)
+    if info_items:
+        text_y -= info_size + 2
+        pdf.setFont('Helvetica', info_size)
+        pdf.drawString(x + padding, text_y, '  '.join(info_items))
+
+    # Zona de códigos
+    code_top = text_y - 2
+    code_height = code_top - (y + padding)
+    code_width = width - 2 * padding
+
+    if include_qr and product_data.get('qr_code') and code_height > 0:
+        qr_size = min(code_height, code_width * 0.35)
+        widget = QrCodeWidget(product_data['qr_code'])
+        x1, y1, x2, y2 = widget.getBounds()
+        qr_drawing = Drawing(x2 - x1, y2 - y1)
+        qr_drawing.add(widget)
+        _draw_scaled(pdf, qr_drawing, x + width - padding - qr_size, y + padding, qr_size, qr_size)
+        code_width -= qr_size + padding
+
+    if product_data.get('barcode') and code_height > 0:
+        drawing = _barcode_drawing(str(product_data['barcode']))
+        _draw_scaled(pdf, drawing, x + padding, y + padding, code_width, code_height)
+
+
+def generate_label_sheet_pdf(products, output_buffer, layout=None, include_qr=False):
+    """
+    Dibuja etiquetas en hojas multi-etiqueta con códigos de barras vectoriales.
+
+    Los productos se consumen de forma incremental, por lo que puede recibir
+    un iterador sobre una consulta sin cargar todo el catálogo en memoria.
+    El PDF en cambio se arma completo antes de escribirse (el canvas guarda
+    cada página hasta ``save()``), por eso se admiten como máximo
+    MAX_SHEET_LABELS etiquetas por documento; lotes mayores deben dividirse.
+
+    Args:
+        products: Iterable de diccionarios con información de productos
+        output_buffer: Archivo o buffer binario donde se escribirá el PDF
+        layout (LabelSheetLayout): Distribución de la hoja
+        include_qr (bool): Incluir código QR en cada etiqueta
+
+    Returns:
+        int: Cantidad de etiquetas dibujadas
+
+    Raises:
+        ValueError: Si se superan MAX_SHEET_LABELS etiquetas
+    """
+    layout = layout or LabelSheetLayout()
+    pdf = canvas.Canvas(output_buffer, pagesize=layout.page_size)
+    pdf.setTitle('Etiquetas de productos')
+
+    count = 0
+    for product_data in products:
+        if count >= MAX_SHEET_LABELS:
+            raise ValueError(f'Máximo {MAX_SHEET_LABELS} etiquetas por hoja PDF')
+        slot = count % layout.labels_per_page
+        if count and slot == 0:
+            pdf.showPage()
+        x, y = layout.label_origin(slot)
+        _draw_label(pdf, product_data, x, y, layout, include_qr)
+        count += 1
+
+    pdf.save()
+    return count
@@ -0,0 +1,234 @@
+from app import db
+from app.models.product_model import Product, InventoryMovement, BarcodeSequence
+from app.utils.barcode_generator import BarcodeGenerator
+from app.utils.barcode_cache import product_cache
+from app.utils.tabular_reader import iter_table_rows, iter_chunks, parse_number, parse_integer
+from datetime import datetime
+from sqlalchemy import insert, update, or_
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Campos del catálogo que se actualizan en modo upsert
+# (el stock solo cambia mediante movimientos de inventario)
+UPSERT_FIELDS = ('name', 'description', 'sku', 'price', 'cost', 'min_stock', 'category', 'supplier')
+
+
+def _text(row, field):
+    value = row.get(field)
+    return str(value).strip() if value not in (None, '') else ''
+
+
+def _parse_row(row):
+    """
+    Convierte una fila del archivo en los valores de un producto.
+
+    Raises:
+        ValueError: Si faltan campos obligatorios o hay valores inválidos
+    """
+    name = _text(row, 'name')
+    if not name:
+        raise ValueError('El campo name es requerido')
+
+    try:
+        price = parse_number(_text(row, 'price') or 0)
+        cost = parse_number(_text(row, 'cost') or 0)
+        stock = parse_integer(_text(row, 'stock') or 0)
+        min_stock = parse_integer(_text(row, 'min_stock') or 10)
+    except (ValueError, OverflowError):
+        raise ValueError('Valores numéricos inválidos en price, cost, stock o min_stock')
+
+    if price <= 0 or cost <= 0:
+        raise ValueError('Los campos price y cost son requeridos')
+    if stock < 0:
+        raise ValueError('El stock no puede ser negativo')
+
+    return {
+        'name': name,
+        'description': _text(row, 'description'),
+        'barcode': _text(row, 'barcode') or None,
+        'sku': _text(row, 'sku') or None,
+        'price': price,
+        'cost': cost,
+        'stock': stock,
+        'min_stock': min_stock,
+        'category': _text(row, 'category'),
+        'supplier': _text(row, 'supplier'),
+    }
+
+
+def _validate_chunk(chunk, seen_barcodes, seen_skus, errors):
+    """
+    Valida un bloque de filas en una sola pasada: formato, dígito de
+    verificación EAN-13 y duplicados dentro del propio archivo.
+
+    Returns:
+        list: Tuplas (número de fila, valores) válidas
+    """
+    valid = []
+    for row_number, row in chunk:
+        try:
+            values = _parse_row(row)
+        except ValueError as e:
+            errors.append({'row': row_number, 'error': str(e)})
+            continue
+
+        barcode = values['barcode']
+        if barcode:
+            validation = BarcodeGenerator.validate_barcode(barcode)
+            if not validation['valid']:
+                errors.append({'row': row_number, 'barcode': barcode,
+                               'error': f'Código de barras inválido: {validation.get("error")}'})
+                continue
+            if barcode in seen_barcodes:
+                errors.append({'row': row_number, 'barcode': barcode,
+                               'error': 'Código de barras duplicado en el archivo'})
+                continue
+            seen_barcodes.add(barcode)
+
+        sku = values['sku']
+        if sku:
+            if sku in seen_skus:
+                errors.append({'row': row_number, 'sku': sku, 'error': 'SKU duplicado en el archivo'})
+                continue
+            seen_skus.add(sku)
+
+        valid.append((row_number, values))
+    return valid
+
+
+def import_products(file_storage, mode='insert', created_by='system', chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Importa un catálogo de productos desde CSV/XLSX por bloques.
+
+    Por cada bloque se hace una sola consulta de códigos/SKU existentes, una
+    inserción masiva de los productos nuevos y, en modo ``upsert``, una
+    actualización masiva de los existentes. Cada bloque se confirma por separado.
+
+    Args:
+        file_storage: Archivo subido
+        mode (str): 'insert' (los existentes se reportan como error) o 'upsert'
+        created_by (str): Usuario que realiza la importación
+        chunk_size (int): Filas por bloque
+
+    Returns:
+        dict: Totales y reporte de errores por fila
+    """
+    if mode not in ('insert', 'upsert'):
+        raise ValueError('El modo debe ser insert o upsert')
+
+    created = 0
+    updated = 0
+    errors = []
+    seen_barcodes = set()
+    seen_skus = set()
+
+    for chunk in iter_chunks(iter_table_rows(file_storage), chunk_size):
+        valid = _validate_chunk(chunk, seen_barcodes, seen_skus, errors)
+        if not valid:
+            continue
+
+        # Productos existentes del bloque con una sola consulta
+        barcodes = [v['barcode'] for _, v in valid if v['barcode']]
+        skus = [v['sku'] for _, v in valid if v['sku']]
+        existing_by_barcode = {}
+        existing_by_sku = {}
+        stored_barcodes = {}
+        if barcodes or skus:
+            rows = db.session.query(Product.id, Product.barcode, Product.sku).filter(
+                or_(Product.barcode.in_(barcodes), Product.sku.in_(skus))
+            ).all()
+            for product_id, barcode, sku in rows:
+                existing_by_barcode[barcode] = (product_id, sku)
+                stored_barcodes[product_id] = barcode
+                if sku:
+                    existing_by_sku[sku] = (product_id, barcode)
+
+        new_rows = []
+        update_rows = []
+        for row_number, values in valid:
+            match = None
+            if values['barcode'] in existing_by_barcode:
+                match = existing_by_barcode[values['barcode']][0]
+            elif values['sku'] in existing_by_sku:
+                match = existing_by_sku[values['sku']][0]
+
+            if match is None:
+                new_rows.append(values)
+                continue
+
+            if mode != 'upsert':
+                errors.append({'row': row_number, 'barcode': values['barcode'], 'sku': values['sku'],
+                               'error': 'El producto ya existe (código de barras o SKU)'})
+                continue
+
+            # El SKU no puede quedar duplicado con otro producto
+            sku_owner = existing_by_sku.get(values['sku'])
+            if values['sku'] and sku_owner and sku_owner[0] != match:
+                errors.append({'row': row_number, 'sku': values['sku'],
+                               'error': f'El SKU {values["sku"]} pertenece a otro producto'})
+                continue
+
+            changes = {field: values[field] for field in UPSERT_FIELDS if values[field] not in (None, '')}
+            changes['id'] = match
+            update_rows.append(changes)
+
+        now = datetime.utcnow()
+
+        if new_rows:
+            # Asignar en bloque los códigos que no vienen en el archivo
+            missing = [values for values in new_rows if not values['barcode']]
+            if missing:
+                for values, code in zip(missing, BarcodeSequence.allocate_barcodes(len(missing))):
+                    values['barcode'] = code
+
+            timestamp = now.strftime('%Y%m%d%H%M%S')
+            for values in new_rows:
+                values.update({
+                    'qr_code': f"PROD-{values['barcode']}-{timestamp}",
+                    'active': True,
+                    'created_at': now,
+                    'updated_at': now,
+                    'created_by': created_by
+                })
+            db.session.execute(insert(Product), new_rows)
+
+            # Movimientos de stock inicial
+            stocked = {v['barcode']: v['stock'] for v in new_rows if v['stock'] > 0}
+            if stocked:
+                ids = db.session.query(Product.id, Product.barcode)\
+                    .filter(Product.barcode.in_(list(stocked))).all()
+                db.session.execute(insert(InventoryMovement), [{
+                    'product_id': product_id,
+                    'type': 'entrada',
+                    'quantity': stocked[barcode],
+                    'previous_stock': 0,
+                    'new_stock': stocked[barcode],
+                    'reason': 'Stock inicial (importación)',
+                    'created_at': now,
+                    'created_by': created_by
+                } for product_id, barcode in ids])
+
+        if update_rows:
+            for changes in update_rows:
+                changes['updated_at'] = now
+            db.session.execute(update(Product), update_rows)
+
+        db.session.commit()
+        created += len(new_rows)
+        updated += len(update_rows)
+
+        # Códigos del archivo y los guardados de los productos actualizados
+        # (una fila que coincide por SKU puede traer otro código o ninguno)
+        stale = set(barcodes)
+        stale.update(stored_barcodes[changes['id']] for changes in update_rows)
+        for code in stale:
+            product_cache.invalidate(code)
+
+    errors.sort(key=lambda e: e['row'])
+    return {
+        'created': created,
+        'updated': updated,
+        'failed': len(errors),
+        'errors': errors
+    }
@@ -0,0 +1,125 @@
+from app import db
+from app.models.product_model import Product
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.text import escape_like
+from sqlalchemy import or_, case, literal, text, tuple_
+
+
+# Índices trigram de Postgres para búsquedas por subcadena y similitud
+TRIGRAM_INDEXES = {
+    'ix_products_name_trgm': 'name',
+    'ix_products_barcode_trgm': 'barcode',
+    'ix_products_sku_trgm': 'sku',
+    'ix_products_description_trgm': 'description',
+}
+
+MAX_SEARCH_LIMIT = 100
+
+
+def is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def ensure_search_indexes():
+    """
+    Crea la extensión pg_trgm y los índices GIN trigram (solo en Postgres).
+    En otros motores se usan los índices B-tree de barcode, sku y name.
+    """
+    if not is_postgres():
+        return []
+
+    with db.engine.begin() as conn:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        for index_name, column in TRIGRAM_INDEXES.items():
+            conn.execute(text(
+                f'CREATE INDEX IF NOT EXISTS {index_name} '
+                f'ON products USING gin ({column} gin_trgm_ops)'
+            ))
+    return list(TRIGRAM_INDEXES)
+
+
+def _rank_expression(query):
+    """
+    Relevancia del resultado (menor es mejor):
+    0 código/SKU exacto, 1 nombre que empieza por la búsqueda,
+    2 código/SKU que empieza por la búsqueda, 3 resto de coincidencias.
+    """
+    prefix = f'{escape_like(query)}%'
+    return case(
+        (or_(Product.barcode == query, Product.sku == query), literal(0)),
+        (Product.name.ilike(prefix, escape='\\'), literal(1)),
+        (or_(Product.barcode.ilike(prefix, escape='\\'),
+             Product.sku.ilike(prefix, escape='\\')), literal(2)),
+        else_=literal(3)
+    )
+
+
+def _match_filter(query):
+    contains = f'%{escape_like(query)}%'
+    conditions = [
+        Product.barcode == query,
+        Product.sku == query,
+        Product.name.ilike(contains, escape='\\'),
+        Product.barcode.ilike(contains, escape='\\'),
+        Product.sku.ilike(contains, escape='\\'),
+        Product.description.ilike(contains, escape='\\'),
+    ]
+    if is_postgres():
+        # Coincidencia aproximada (errores de tipeo) con pg_trgm
+        conditions.append(Product.name.op('%')(query))
+    return or_(*conditions)
+
+
+def search_products_ranked(query, category='', low_stock=False, limit=20, cursor=None):
+    """
+    Búsqueda de productos ordenada por relevancia con paginación por cursor.
+
+    El orden es (relevancia, nombre, id); el cursor guarda esos valores del
+    último resultado para pedir la siguiente página sin OFFSET.
+
+    Args:
+        query (str): Texto a buscar
+        category (str): Filtrar por categoría
+        low_stock (bool): Solo productos con stock bajo
+        limit (int): Resultados por página (máximo MAX_SEARCH_LIMIT)
+        cursor (str): Cursor devuelto por la página anterior
+
+    Returns:
+        dict: Productos de la página y cursor siguiente (o None)
+    """
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    rank = _rank_expression(query) if query else literal(0)
+
+    products_query = db.session.query(Product, rank.label('rank')).filter(Product.active == True)
+
+    if query:
+        products_query = products_query.filter(_match_filter(query))
+    if category:
+        products_query = products_query.filter(Product.category == category)
+    if low_stock:
+        products_query = products_query.filter(Product.stock < Product.min_stock)
+
+    if cursor:
+        last_rank, last_name, last_id = decode_cursor(cursor)
+        products_query = products_query.filter(
+            tuple_(rank, Product.name, Product.id) > tuple_(last_rank, last_name, last_id)
+        )
+
+    rows = products_query.order_by(rank, Product.name, Product.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last_product, last_rank = rows[-1]
+        next_cursor = encode_cursor([int(last_rank), last_product.name, last_product.id])
+
+    return {
+        'products': [
+            dict(product.to_dict(), rank=int(product_rank))
+            for product, product_rank in rows
+        ],
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
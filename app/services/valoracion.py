@@ -0,0 +1,275 @@
+import os
+from datetime import datetime
+from app import db
+from app.models.inventario_model import Producto, MovimientoInventario, CapaCosto, SaldoValorizado
+from sqlalchemy import insert
+
+
+# Método con el que se informa el costo de ventas de cada salida: 'promedio' o 'fifo'.
+# Los saldos se mantienen con ambos métodos.
+METODO_VALORACION = os.getenv('METODO_VALORACION', 'promedio')
+METODOS = ('promedio', 'fifo')
+
+
+def _nuevo_saldo(producto_id):
+    saldo = SaldoValorizado(
+        producto_id=producto_id,
+        cantidad=0,
+        costo_promedio=0,
+        valor_promedio=0,
+        valor_fifo=0,
+        costo_ventas_promedio=0,
+        costo_ventas_fifo=0,
+        valor_faltante=0
+    )
+    db.session.add(saldo)
+    return saldo
+
+
+def registrar_movimiento(movimiento, costo_unitario=None):
+    """
+    Actualiza las capas de costo y el saldo valorizado con un movimiento
+    recién agregado a la sesión (se confirma junto con él).
+
+    Args:
+        movimiento (MovimientoInventario): Movimiento a valorizar
+        costo_unitario (float): Costo de las unidades que entran
+    """
+    return registrar_movimientos([movimiento], [costo_unitario])[movimiento.producto_id]
+
+
+def registrar_movimientos(movimientos, costos=None):
+    """
+    Valoriza varios movimientos, en orden, con una consulta para los saldos
+    y otra para las capas abiertas (bloqueados hasta el fin de la transacción).
+
+    Las entradas crean una capa con su costo (por defecto el costo del
+    producto en entradas y el costo promedio en ajustes). Las salidas
+    consumen las capas más antiguas (FIFO) y descuentan al costo promedio;
+    el costo de ventas según METODO_VALORACION queda en el movimiento.
+
+    Una salida que deja el saldo negativo no tiene capas para las unidades
+    faltantes: se costean provisionalmente al costo promedio y ese valor se
+    acumula en ``valor_faltante``. La siguiente entrada cubre primero las
+    unidades faltantes (sin crear capa para ellas) y ajusta el costo de
+    ventas al costo real, así la suma de las capas siempre coincide con la
+    cantidad positiva del saldo y ambos métodos valorizan lo mismo.
+
+    Args:
+        movimientos (list): MovimientoInventario agregados a la sesión
+        costos (list): Costo unitario de cada movimiento de entrada (o None)
+
+    Returns:
+        dict: Saldo actualizado por producto_id
+    """
+    if not movimientos:
+        return {}
+    costos = costos or [None] * len(movimientos)
+    if any(m.id is None for m in movimientos):
+        db.session.flush()
+
+    producto_ids = sorted({m.producto_id for m in movimientos})
+    productos = {p.id: p for p in Producto.query.filter(Producto.id.in_(producto_ids))}
+    saldos = {
+        s.producto_id: s
+        for s in SaldoValorizado.query.filter(SaldoValorizado.producto_id.in_(producto_ids))
+            .order_by(SaldoValorizado.producto_id).with_for_update()
+    }
+    for producto_id in producto_ids:
+        if producto_id not in saldos:
+            saldos[producto_id] = _nuevo_saldo(producto_id)
+
+    # Capas abiertas de los productos con salidas, de la más antigua a la más nueva
+    con_salidas = {m.producto_id for m in movimientos if m.cantidad_nueva < m.cantidad_anterior}
+    capas = {producto_id: [] for producto_id in producto_ids}
+    if con_salidas:
+        for capa in CapaCosto.query.filter(
+            CapaCosto.producto_id.in_(con_salidas),
+            CapaCosto.cantidad_restante > 0
+        ).order_by(CapaCosto.producto_id, CapaCosto.id).with_for_update():
+            capas[capa.producto_id].append(capa)
+
+    ahora = datetime.utcnow()
+    for movimiento, costo_unitario in zip(movimientos, costos):
+        producto = productos[movimiento.producto_id]
+        saldo = saldos[movimiento.producto_id]
+        delta = movimiento.cantidad_nueva - movimiento.cantidad_anterior
+
+        if delta > 0:
+            if costo_unitario is None:
+                if movimiento.tipo != 'entrada' and saldo.cantidad > 0:
+                    costo_unitario = saldo.costo_promedio
+                else:
+                    costo_unitario = producto.costo_unitario or 0
+
+            # Unidades ya vendidas sin stock: se cubren primero y su costo
+            # provisional se reemplaza por el de esta entrada
+            faltante = min(delta, max(0, -saldo.cantidad))
+            if faltante:
+                provisional = (saldo.valor_faltante or 0) * faltante / -saldo.cantidad
+                ajuste = faltante * costo_unitario - provisional
+                saldo.costo_ventas_promedio += ajuste
+                saldo.costo_ventas_fifo += ajuste
+                saldo.valor_faltante = (saldo.valor_faltante or 0) - provisional
+
+            nuevas = delta - faltante
+            if nuevas:
+                capa = CapaCosto(
+                    producto_id=producto.id,
+                    movimiento_id=movimiento.id,
+                    fecha=movimiento.fecha or ahora,
+                    cantidad_inicial=nuevas,
+                    cantidad_restante=nuevas,
+                    costo_unitario=costo_unitario
+                )
+                db.session.add(capa)
+                capas[producto.id].append(capa)
+            saldo.cantidad += delta
+            saldo.valor_promedio += nuevas * costo_unitario
+            saldo.valor_fifo += nuevas * costo_unitario
+            if saldo.cantidad > 0:
+                saldo.costo_promedio = saldo.valor_promedio / saldo.cantidad
+
+            movimiento.costo_unitario = costo_unitario
+            movimiento.costo_total = delta * costo_unitario
+
+        elif delta < 0:
+            unidades = -delta
+            costo_promedio = saldo.costo_promedio or producto.costo_unitario or 0
+
+            # FIFO: consumir las capas abiertas más antiguas
+            pendiente = unidades
+            costo_fifo = 0.0
+            for capa in capas[producto.id]:
+                if pendiente == 0:
+                    break
+                consumo = min(pendiente, capa.cantidad_restante)
+                capa.cantidad_restante -= consumo
+                costo_fifo += consumo * capa.costo_unitario
+                pendiente -= consumo
+            capas[producto.id] = [c for c in capas[producto.id] if c.cantidad_restante > 0]
+            consumido_fifo = costo_fifo
+            # Unidades sin capas (stock negativo) se costean al promedio hasta
+            # que una entrada las cubra
+            costo_fifo += pendiente * costo_promedio
+            saldo.valor_faltante = (saldo.valor_faltante or 0) + pendiente * costo_promedio
+
+            costo_prom = unidades * costo_promedio
+            saldo.cantidad -= unidades
+            saldo.valor_fifo -= consumido_fifo
+            saldo.valor_promedio = saldo.cantidad * costo_promedio if saldo.cantidad > 0 else 0
+            saldo.costo_ventas_promedio += costo_prom
+            saldo.costo_ventas_fifo += costo_fifo
+
+            costo_total = costo_fifo if METODO_VALORACION == 'fifo' else costo_prom
+            movimiento.costo_unitario = costo_total / unidades
+            movimiento.costo_total = costo_total
+
+        saldo.actualizado = ahora
+
+    return saldos
+
+
+def inicializar_saldos(chunk_size=1000):
+    """
+    Crea el saldo y una capa de apertura (al costo del producto) para los
+    productos que aún no tienen saldo, p. ej. los existentes antes de
+    activar la valoración.
+
+    Returns:
+        int: Productos inicializados
+    """
+    inicializados = 0
+    ahora = datetime.utcnow()
+    while True:
+        productos = db.session.query(Producto.id, Producto.cantidad, Producto.costo_unitario)\
+            .outerjoin(SaldoValorizado, SaldoValorizado.producto_id == Producto.id)\
+            .filter(SaldoValorizado.producto_id.is_(None))\
+            .order_by(Producto.id)\
+            .limit(chunk_size)\
+            .all()
+        if not productos:
+            break
+
+        saldos = []
+        capas = []
+        for producto_id, cantidad, costo in productos:
+            cantidad = cantidad or 0
+            costo = costo or 0
+            saldos.append({
+                'producto_id': producto_id,
+                'cantidad': cantidad,
+                'costo_promedio': costo,
+                'valor_promedio': cantidad * costo if cantidad > 0 else 0,
+                'valor_fifo': cantidad * costo if cantidad > 0 else 0,
+                'costo_ventas_promedio': 0,
+                'costo_ventas_fifo': 0,
+                'valor_faltante': -cantidad * costo if cantidad < 0 else 0,
+                'actualizado': ahora
+            })
+            if cantidad > 0:
+                capas.append({
+                    'producto_id': producto_id,
+                    'movimiento_id': None,
+                    'fecha': ahora,
+                    'cantidad_inicial': cantidad,
+                    'cantidad_restante': cantidad,
+                    'costo_unitario': costo
+                })
+
+        db.session.execute(insert(SaldoValorizado), saldos)
+        if capas:
+            db.session.execute(insert(CapaCosto), capas)
+        db.session.commit()
+        inicializados += len(saldos)
+
+    return inicializados
+
+
+def reporte_valoracion(metodo=None):
+    """
+    Valorización del inventario leída de los saldos precalculados.
+
+    Args:
+        metodo (str): 'promedio' o 'fifo' (por defecto METODO_VALORACION)
+
+    Returns:
+        dict: Productos con cantidad, costo y valor, y totales
+    """
+    metodo = metodo or METODO_VALORACION
+    if metodo not in METODOS:
+        raise ValueError(f'Método de valoración no soportado: {metodo}')
+
+    filas = db.session.query(SaldoValorizado, Producto.codigo, Producto.nombre)\
+        .join(Producto, Producto.id == SaldoValorizado.producto_id)\
+        .order_by(Producto.nombre, Producto.id)\
+        .all()
+
+    productos = []
+    for saldo, codigo, nombre in filas:
+        datos = saldo.to_dict()
+        productos.append({
+            'producto_id': saldo.producto_id,
+            'codigo': codigo,
+            'nombre': nombre,
+            'cantidad': datos['cantidad'],
+            'costo_unitario': datos['costo_fifo'] if metodo == 'fifo' else datos['costo_promedio'],
+            'valor': datos['valor_fifo'] if metodo == 'fifo' else datos['valor_promedio'],
+            'costo_ventas': datos['costo_ventas_fifo'] if metodo == 'fifo' else datos['costo_ventas_promedio']
+        })
+
+    return {
+        'metodo': metodo,
+        'productos': productos,
+        'valor_total': round(sum(p['valor'] for p in productos), 2),
+        'costo_ventas_total': round(sum(p['costo_ventas'] for p in productos), 2)
+    }
+
+
+def costo_de_movimiento(producto_id, motivo, tipo='salida'):
+    """Costo unitario con que se valorizó un movimiento anterior (p. ej. para revertirlo)"""
+    return db.session.query(MovimientoInventario.costo_unitario).filter(
+        MovimientoInventario.producto_id == producto_id,
+        MovimientoInventario.tipo == tipo,
+        MovimientoInventario.motivo == motivo
+    ).order_by(MovimientoInventario.id.desc()).limit(1).scalar()
@@ -0,0 +1,137 @@
+import os
+from app.models.product_model import Product
+from app.utils.label_templates import FIELD_FORMATS, LabelTemplate, get_label_template
+
+
+# Ancho de la etiqueta en puntos de la impresora (4" a 203 dpi por defecto).
+# Las plantillas están en píxeles y se escalan a este ancho.
+ZPL_LABEL_WIDTH = int(os.getenv('ZPL_LABEL_WIDTH', 812))
+
+# Caracteres que ZPL interpreta como comandos; se envían en hexadecimal con ^FH
+ZPL_ESCAPES = {'_': '_5F', '^': '_5E', '~': '_7E'}
+
+
+def zpl_text(value):
+    """Escapa un texto para usarlo dentro de ^FH^FD...^FS"""
+    return ''.join(ZPL_ESCAPES.get(c, c) for c in str(value).replace('\n', ' '))
+
+
+def _barcode_command(code, width, height):
+    """
+    Código de barras nativo de la impresora: ^BE para EAN-13 válidos (la
+    impresora calcula el dígito verificador) y ^BC (Code 128) para el resto.
+    El ancho de módulo (^BY) se elige para ocupar el ancho disponible.
+    """
+    if len(code) == 13 and code.isdigit() and Product.ean13_check_digit(code) == int(code[12]):
+        module = max(1, min(10, width // 95))
+        return f'^BY{module}^BEN,{height},Y,N^FD{code[:12]}^FS'
+    module = max(1, min(10, width // (11 * len(code) + 35)))
+    return f'^BY{module}^BCN,{height},Y,N,N^FH^FD{zpl_text(code)}^FS'
+
+
+def render_zpl_label(product_data, include_qr=False, template=None, copies=1):
+    """
+    Genera la etiqueta de un producto en ZPL con los mismos campos y
+    distribución que la plantilla PNG. El código de barras y el QR se
+    envían como comandos y los dibuja la impresora.
+
+    Args:
+        product_data (dict): Información del producto
+        include_qr (bool): Incluir el código QR
+        template (str): Plantilla de etiqueta
+        copies (int): Copias a imprimir (^PQ)
+
+    Returns:
+        str: Etiqueta ZPL (^XA ... ^XZ)
+    """
+    label_template = get_label_template(template or ('barcode_qr' if include_qr else 'barcode'))
+    config = label_template.config
+    scale = ZPL_LABEL_WIDTH / label_template.width
+
+    def dots(value):
+        return int(round(value * scale))
+
+    width = ZPL_LABEL_WIDTH
+    height = dots(label_template.height)
+    margin = dots(LabelTemplate.MARGIN)
+    separator_y = dots(label_template.separator_y)
+
+    lines = [
+        '^XA',
+        '^CI28',
+        f'^PW{width}',
+        f'^LL{height}',
+    ]
+
+    # Título del producto
+    title_size = dots(int(config['title_size']))
+    max_chars = int(config.get('title_max_chars', 40))
+    product_name = (product_data.get('name') or 'Producto')[:max_chars]
+    lines.append(
+        f'^FO{margin},{margin}^A0N,{title_size},{title_size}'
+        f'^FH^FD{zpl_text(product_name)}^FS'
+    )
+    lines.append(f'^FO{margin},{separator_y}^GB{width - 2 * margin},2,2^FS')
+    y_position = separator_y + margin
+
+    # Precio destacado (etiqueta de precio)
+    if config.get('price_size') and product_data.get('price'):
+        price_size = dots(int(config['price_size']))
+        price = f"${product_data['price']:,.2f}"
+        lines.append(
+            f'^FO{margin},{y_position}^A0N,{price_size},{price_size}'
+            f'^FH^FD{zpl_text(price)}^FS'
+        )
+        y_position += price_size + dots(10)
+
+    # Información adicional
+    text_size = dots(int(config['text_size']))
+    for field in label_template.fields:
+        value = product_data.get(field)
+        if value:
+            lines.append(
+                f'^FO{margin},{y_position}^A0N,{text_size},{text_size}'
+                f'^FH^FD{zpl_text(FIELD_FORMATS[field](value))}^FS'
+            )
+            y_position += dots(LabelTemplate.LINE_HEIGHT)
+
+    y_position += dots(10)
+
+    # Código de barras (alto disponible menos la línea de interpretación)
+    barcode = product_data.get('barcode')
+    if barcode and config.get('show_barcode', True):
+        barcode_height = height - y_position - text_size - dots(15)
+        if barcode_height > 0:
+            lines.append(f'^FO{dots(20)},{y_position}')
+            lines.append(_barcode_command(str(barcode), width - 2 * dots(20), barcode_height))
+
+    # Código QR en la esquina inferior derecha
+    qr_code = product_data.get('qr_code')
+    if (include_qr or config.get('show_qr')) and qr_code:
+        qr_size = dots(int(config.get('qr_size', 120)))
+        magnification = max(1, min(10, qr_size // 33))
+        lines.append(
+            f'^FO{width - qr_size - dots(20)},{height - qr_size - dots(20)}'
+            f'^BQN,2,{magnification}^FH^FDMA,{zpl_text(qr_code)}^FS'
+        )
+
+    if copies > 1:
+        lines.append(f'^PQ{int(copies)}')
+    lines.append('^XZ')
+    return '\n'.join(lines) + '\n'
+
+
+def render_zpl_labels(products, include_qr=False, template=None, copies=1):
+    """
+    Genera varias etiquetas ZPL concatenadas en un solo documento.
+
+    Args:
+        products (iterable): Diccionarios con información de productos
+
+    Returns:
+        str: Documento ZPL listo para enviar a la impresora
+    """
+    return ''.join(
+        render_zpl_label(product_data, include_qr, template, copies)
+        for product_data in products
+    )
@@ -0,0 +1,54 @@
+import logging
+import threading
+from flask import current_app, has_app_context
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRebuilder:
+    """
+    Ejecuta la reconstrucción de un índice en memoria en un hilo aparte, una
+    a la vez por proceso. La solicitud que detecta el índice vencido sigue
+    respondiendo con los datos actuales en lugar de esperar una lectura
+    completa de la tabla.
+    """
+
+    def __init__(self, name, rebuild):
+        self.name = name
+        self._rebuild = rebuild
+        self._running = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._running
+
+    def request(self):
+        """
+        Inicia la reconstrucción si no hay una en curso. Requiere un contexto
+        de aplicación (el hilo abre uno propio con la misma aplicación).
+
+        Returns:
+            bool: True si se inició una reconstrucción
+        """
+        if not has_app_context():
+            return False
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    self._rebuild()
+            except Exception:
+                logger.exception('Error al reconstruir el índice %s', self.name)
+            finally:
+                with self._lock:
+                    self._running = False
+
+        threading.Thread(target=run, name=f'rebuild-{self.name}', daemon=True).start()
+        return True
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProductLookupCache:
+    """
+    Caché en memoria (LRU con expiración) de código de barras -> producto serializado.
+    Evita consultar la base de datos en cada escaneo de /barcode/api/scan.
+    """
+
+    def __init__(self, max_size=5000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, barcode):
+        """
+        Obtiene el producto serializado de un código de barras.
+
+        Returns:
+            dict | None: Producto en caché o None si no existe o expiró
+        """
+        with self._lock:
+            entry = self._data.get(barcode)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, product_data = entry
+            if expires_at < time.monotonic():
+                del self._data[barcode]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(barcode)
+            self.hits += 1
+            return product_data
+
+    def set(self, barcode, product_data):
+        """Guarda (o reemplaza) el producto serializado de un código de barras"""
+        if not barcode:
+            return
+        with self._lock:
+            self._data[barcode] = (time.monotonic() + self.ttl, product_data)
+            self._data.move_to_end(barcode)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, barcode):
+        """Elimina un código de barras de la caché"""
+        with self._lock:
+            if self._data.pop(barcode, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Vacía la caché por completo"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Retorna contadores de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+# Instancia compartida por proceso
+product_cache = ProductLookupCache(
+    max_size=int(os.getenv('BARCODE_CACHE_SIZE', 5000)),
+    ttl=int(os.getenv('BARCODE_CACHE_TTL', 300))
+)
@@ -0,0 +1,82 @@
+import os
+from io import BytesIO
+from PIL import Image, ImageOps
+from app.utils.process_pool import SharedProcessPool
+
+
+# Lado máximo (px) al que se reduce cada imagen antes de decodificar
+DECODE_MAX_SIDE = int(os.getenv('BARCODE_DECODE_MAX_SIDE', 1600))
+DECODE_POOL_WORKERS = int(os.getenv('BARCODE_DECODE_WORKERS', os.cpu_count() or 1))
+# Segundos máximos para decodificar un lote en el pool
+DECODE_POOL_TIMEOUT = float(os.getenv('BARCODE_DECODE_TIMEOUT', 30))
+
+decode_pool = SharedProcessPool('decodificacion', DECODE_POOL_WORKERS)
+
+
+def decode_image(image_bytes, max_side=DECODE_MAX_SIDE):
+    """
+    Decodifica los códigos de barras/QR de una imagen.
+    La imagen se reduce a ``max_side`` px y se pasa a escala de grises
+    antes de decodificar, lo que acota el costo de CPU por imagen.
+
+    Args:
+        image_bytes (bytes): Contenido del archivo de imagen
+
+    Returns:
+        dict: Resultado con la lista de códigos encontrados o error
+    """
+    try:
+        from pyzbar import pyzbar
+    except ImportError as e:
+        return {
+            'success': False,
+            'error': f'pyzbar no está disponible: {e}'
+        }
+
+    try:
+        img = Image.open(BytesIO(image_bytes))
+        # draft() solo tiene efecto antes de cargar los píxeles (JPEG se
+        # decodifica ya reducido); exif_transpose carga la imagen
+        img.draft('L', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('L')
+        img.thumbnail((max_side, max_side))
+
+        codes = []
+        seen = set()
+        for symbol in pyzbar.decode(img):
+            data = symbol.data.decode('utf-8', errors='replace')
+            if (data, symbol.type) in seen:
+                continue
+            seen.add((data, symbol.type))
+            codes.append({'data': data, 'type': symbol.type})
+
+        return {
+            'success': True,
+            'codes': codes
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+
+def decode_images(images, workers=None):
+    """
+    Decodifica varias imágenes; con más de una se reparten en un pool de procesos.
+
+    Args:
+        images (list): Lista de bytes de imágenes
+        workers (int): Procesos a usar (por defecto BARCODE_DECODE_WORKERS)
+
+    Returns:
+        list: Resultado de decode_image para cada imagen, en el mismo orden
+    """
+    workers = DECODE_POOL_WORKERS if workers is None else workers
+    if workers > 1 and len(images) > 1:
+        results = decode_pool.map(decode_image, images, timeout=DECODE_POOL_TIMEOUT)
+        if results is not None:
+            return results
+    return [decode_image(image) for image in images]
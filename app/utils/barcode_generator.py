@@ -1,9 +1,32 @@
 import barcode
 from barcode.writer import ImageWriter
 import qrcode
+import qrcode.image.svg
 from io import BytesIO
 import base64
-from PIL import Image, ImageDraw, ImageFont
+import os
+from PIL import Image
+from app.utils.image_cache import image_cache
+from app.utils.label_templates import get_label_template
+from app.utils.process_pool import SharedProcessPool
+
+# Pool de procesos para etiquetas en lote (se crea al primer uso)
+LABEL_POOL_WORKERS = int(os.getenv('LABEL_POOL_WORKERS', os.cpu_count() or 1))
+LABEL_POOL_MIN_BATCH = int(os.getenv('LABEL_POOL_MIN_BATCH', 20))
+LABEL_POOL_CHUNK_SIZE = int(os.getenv('LABEL_POOL_CHUNK_SIZE', 25))
+# Segundos máximos para un lote en el pool antes de generarlo en el proceso
+LABEL_POOL_TIMEOUT = float(os.getenv('LABEL_POOL_TIMEOUT', 60))
+
+label_pool = SharedProcessPool('etiquetas', LABEL_POOL_WORKERS)
+
+
+def _render_label_chunk(products_chunk, include_qr, template=None):
+    """Genera las etiquetas de un bloque de productos (se ejecuta en el pool)"""
+    return [
+        BarcodeGenerator.generate_product_label(product_data, include_qr, template)
+        for product_data in products_chunk
+    ]
+
 
 class BarcodeGenerator:
     """
@@ -11,58 +34,108 @@ class BarcodeGenerator:
     Soporta múltiples formatos y opciones de personalización.
     """
     
+    # Opciones del writer de imágenes (forman parte de la clave de caché)
+    BARCODE_WRITER_OPTIONS = {
+        'module_width': 0.3,
+        'module_height': 15.0,
+        'quiet_zone': 6.5,
+        'font_size': 10,
+        'text_distance': 5.0,
+    }
+    
+    # Campos del producto que se dibujan en la etiqueta
+    LABEL_FIELDS = ('name', 'sku', 'category', 'price', 'supplier', 'barcode', 'qr_code')
+    
+    # Tipos de código soportados -> clase de python-barcode
+    BARCODE_CLASSES = {
+        'ean13': 'ean13',
+        'code128': 'code128',
+        'code39': 'code39',
+        'upc': 'upca',
+    }
+    
+    # Niveles de corrección de errores QR
+    QR_ERROR_LEVELS = {
+        'L': qrcode.constants.ERROR_CORRECT_L,
+        'M': qrcode.constants.ERROR_CORRECT_M,
+        'Q': qrcode.constants.ERROR_CORRECT_Q,
+        'H': qrcode.constants.ERROR_CORRECT_H
+    }
+    
+    IMAGE_FORMATS = ('png', 'svg')
+    
     @staticmethod
-    def generate_barcode_image(code, barcode_type='ean13'):
+    def barcode_cache_key(code, barcode_type='ean13', image_format='png'):
+        """Clave de caché (y ETag) de un código de barras renderizado"""
+        return image_cache.make_key(
+            'barcode', code, barcode_type, image_format, BarcodeGenerator.BARCODE_WRITER_OPTIONS
+        )
+    
+    @staticmethod
+    def render_barcode(code, barcode_type='ean13', image_format='png'):
         """
-        Genera una imagen de código de barras.
+        Renderiza un código de barras y retorna los bytes de la imagen.
         
         Args:
             code (str): Código a generar
             barcode_type (str): Tipo de código ('ean13', 'code128', 'code39', 'upc')
+            image_format (str): 'png' o 'svg'
         
         Returns:
-            dict: Resultado con imagen en base64 o error
+            bytes: Imagen renderizada
+        
+        Raises:
+            ValueError: Si el código, el tipo o el formato no son válidos
         """
-        try:
-            # Seleccionar tipo de código de barras
-            barcode_class = None
-            
-            if barcode_type == 'ean13':
-                barcode_class = barcode.get_barcode_class('ean13')
-                # EAN-13 requiere exactamente 13 dígitos
-                if len(code) != 13:
-                    return {
-                        'success': False,
-                        'error': 'EAN-13 requiere exactamente 13 dígitos'
-                    }
-            elif barcode_type == 'code128':
-                barcode_class = barcode.get_barcode_class('code128')
-            elif barcode_type == 'code39':
-                barcode_class = barcode.get_barcode_class('code39')
-            elif barcode_type == 'upc':
-                barcode_class = barcode.get_barcode_class('upca')
+        if barcode_type not in BarcodeGenerator.BARCODE_CLASSES:
+            raise ValueError(f'Tipo de código no soportado: {barcode_type}')
+        if image_format not in BarcodeGenerator.IMAGE_FORMATS:
+            raise ValueError(f'Formato de imagen no soportado: {image_format}')
+        
+        # EAN-13 requiere exactamente 13 dígitos
+        if barcode_type == 'ean13' and len(code) != 13:
+            raise ValueError('EAN-13 requiere exactamente 13 dígitos')
+        
+        barcode_class = barcode.get_barcode_class(BarcodeGenerator.BARCODE_CLASSES[barcode_type])
+        
+        def render():
+            # Crear código de barras (SVG es el writer por defecto)
+            if image_format == 'png':
+                barcode_instance = barcode_class(code, writer=ImageWriter())
             else:
-                return {
-                    'success': False,
-                    'error': f'Tipo de código no soportado: {barcode_type}'
-                }
-            
-            # Crear código de barras
-            barcode_instance = barcode_class(code, writer=ImageWriter())
+                barcode_instance = barcode_class(code)
             
             # Guardar en buffer
             buffer = BytesIO()
-            barcode_instance.write(buffer, options={
-                'module_width': 0.3,
-                'module_height': 15.0,
-                'quiet_zone': 6.5,
-                'font_size': 10,
-                'text_distance': 5.0,
-            })
-            buffer.seek(0)
+            barcode_instance.write(buffer, options=BarcodeGenerator.BARCODE_WRITER_OPTIONS)
+            return buffer.getvalue()
+        
+        # Servir desde caché si ya se renderizó con los mismos parámetros
+        cache_key = BarcodeGenerator.barcode_cache_key(code, barcode_type, image_format)
+        return image_cache.get_or_render(cache_key, render)
+    
+    @staticmethod
+    def barcode_pil_image(code, barcode_type='ean13'):
+        """Retorna el código de barras como imagen PIL"""
+        return Image.open(BytesIO(BarcodeGenerator.render_barcode(code, barcode_type)))
+    
+    @staticmethod
+    def generate_barcode_image(code, barcode_type='ean13'):
+        """
+        Genera una imagen de código de barras.
+        
+        Args:
+            code (str): Código a generar
+            barcode_type (str): Tipo de código ('ean13', 'code128', 'code39', 'upc')
+        
+        Returns:
+            dict: Resultado con imagen en base64 o error
+        """
+        try:
+            png_bytes = BarcodeGenerator.render_barcode(code, barcode_type)
             
             # Convertir a base64
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
+            img_base64 = base64.b64encode(png_bytes).decode()
             
             return {
                 'success': True,
@@ -78,29 +151,35 @@ class BarcodeGenerator:
             }
     
     @staticmethod
-    def generate_qr_image(data, size=10, error_correction='M'):
+    def qr_cache_key(data, size=10, error_correction='M', image_format='png'):
+        """Clave de caché (y ETag) de un código QR renderizado"""
+        return image_cache.make_key('qr', data, size, error_correction, image_format, 4)
+    
+    @staticmethod
+    def render_qr(data, size=10, error_correction='M', image_format='png'):
         """
-        Genera una imagen de código QR.
+        Renderiza un código QR y retorna los bytes de la imagen.
         
         Args:
             data (str): Datos a codificar
-            size (int): Tamaño del QR (1-40)
+            size (int): Tamaño de cada módulo en píxeles
             error_correction (str): Nivel de corrección ('L', 'M', 'Q', 'H')
+            image_format (str): 'png' o 'svg'
         
         Returns:
-            dict: Resultado con imagen en base64 o error
+            bytes: Imagen renderizada
+        
+        Raises:
+            ValueError: Si el formato no es válido
         """
-        try:
-            # Mapear nivel de corrección de errores
-            error_map = {
-                'L': qrcode.constants.ERROR_CORRECT_L,
-                'M': qrcode.constants.ERROR_CORRECT_M,
-                'Q': qrcode.constants.ERROR_CORRECT_Q,
-                'H': qrcode.constants.ERROR_CORRECT_H
-            }
-            
-            error_level = error_map.get(error_correction, qrcode.constants.ERROR_CORRECT_M)
-            
+        if image_format not in BarcodeGenerator.IMAGE_FORMATS:
+            raise ValueError(f'Formato de imagen no soportado: {image_format}')
+        
+        error_level = BarcodeGenerator.QR_ERROR_LEVELS.get(
+            error_correction, qrcode.constants.ERROR_CORRECT_M
+        )
+        
+        def render():
             # Crear código QR
             qr = qrcode.QRCode(
                 version=1,
@@ -112,13 +191,45 @@ class BarcodeGenerator:
             qr.make(fit=True)
             
             # Generar imagen
-            img = qr.make_image(fill_color="black", back_color="white")
+            buffer = BytesIO()
+            if image_format == 'png':
+                img = qr.make_image(fill_color="black", back_color="white")
+                img.save(buffer, format='PNG')
+            else:
+                img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+                img.save(buffer)
+            return buffer.getvalue()
+        
+        # Servir desde caché si ya se renderizó con los mismos parámetros
+        cache_key = BarcodeGenerator.qr_cache_key(data, size, error_correction, image_format)
+        return image_cache.get_or_render(cache_key, render)
+    
+    @staticmethod
+    def qr_pil_image(data, size=10, error_correction='M'):
+        """Retorna el código QR como imagen PIL"""
+        return Image.open(BytesIO(BarcodeGenerator.render_qr(data, size, error_correction)))
+    
+    @staticmethod
+    def generate_qr_image(data, size=10, error_correction='M'):
+        """
+        Genera una imagen de código QR.
+        
+        Args:
+            data (str): Datos a codificar
+            size (int): Tamaño del QR (1-40)
+            error_correction (str): Nivel de corrección ('L', 'M', 'Q', 'H')
+        
+        Returns:
+            dict: Resultado con imagen en base64 o error
+        """
+        try:
+            if error_correction not in BarcodeGenerator.QR_ERROR_LEVELS:
+                error_correction = 'M'
+            
+            png_bytes = BarcodeGenerator.render_qr(data, size, error_correction)
             
             # Convertir a base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
+            img_base64 = base64.b64encode(png_bytes).decode()
             
             return {
                 'success': True,
@@ -135,102 +246,55 @@ class BarcodeGenerator:
             }
     
     @staticmethod
-    def generate_product_label(product_data, include_qr=False):
+    def _label_template(include_qr=False, template=None):
+        """Resuelve la plantilla a usar (por defecto según include_qr)"""
+        return get_label_template(template or ('barcode_qr' if include_qr else 'barcode'))
+    
+    @staticmethod
+    def label_cache_key(product_data, include_qr=False, template=None):
+        """
+        Clave de caché (y ETag) de una etiqueta: campos LABEL_FIELDS, plantilla
+        (nombre, versión del diseño y configuración) y opciones de renderizado
+        """
+        label_template = BarcodeGenerator._label_template(include_qr, template)
+        return image_cache.make_key(
+            'label',
+            [product_data.get(field) for field in BarcodeGenerator.LABEL_FIELDS],
+            bool(include_qr),
+            label_template.cache_key_parts(),
+            BarcodeGenerator.BARCODE_WRITER_OPTIONS
+        )
+    
+    @staticmethod
+    def render_product_label(product_data, include_qr=False, template=None):
+        """Retorna los bytes PNG de la etiqueta de un producto (con caché)"""
+        def render():
+            img = BarcodeGenerator._render_product_label(product_data, include_qr, template)
+            buffer = BytesIO()
+            img.save(buffer, format='PNG')
+            return buffer.getvalue()
+        
+        cache_key = BarcodeGenerator.label_cache_key(product_data, include_qr, template)
+        return image_cache.get_or_render(cache_key, render)
+    
+    @staticmethod
+    def generate_product_label(product_data, include_qr=False, template=None):
         """
         Genera una etiqueta completa con código de barras y información del producto.
         
         Args:
             product_data (dict): Información del producto
             include_qr (bool): Incluir código QR en la etiqueta
+            template (str): Plantilla ('barcode', 'barcode_qr', 'price_tag', ...)
         
         Returns:
             dict: Resultado con imagen en base64 o error
         """
         try:
-            # Dimensiones de la etiqueta (ajustables según necesidad)
-            width, height = 500, 400 if include_qr else 350
-            img = Image.new('RGB', (width, height), 'white')
-            draw = ImageDraw.Draw(img)
-            
-            # Intentar cargar fuentes del sistema
-            try:
-                title_font = ImageFont.truetype("arial.ttf", 22)
-                text_font = ImageFont.truetype("arial.ttf", 16)
-                small_font = ImageFont.truetype("arial.ttf", 12)
-            except:
-                # Fallback a fuente por defecto
-                title_font = ImageFont.load_default()
-                text_font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-            
-            # Información del producto
-            y_position = 15
-            
-            # Título del producto
-            product_name = product_data.get('name', 'Producto')[:40]
-            draw.text((15, y_position), product_name, fill='black', font=title_font)
-            y_position += 35
-            
-            # Línea divisoria
-            draw.line([(15, y_position), (width-15, y_position)], fill='#cccccc', width=2)
-            y_position += 15
-            
-            # Información adicional
-            info_items = []
-            
-            if product_data.get('sku'):
-                info_items.append(f"SKU: {product_data['sku']}")
-            
-            if product_data.get('category'):
-                info_items.append(f"Categoría: {product_data['category']}")
-            
-            if product_data.get('price'):
-                info_items.append(f"Precio: ${product_data['price']:,.2f}")
-            
-            for item in info_items:
-                draw.text((15, y_position), item, fill='black', font=text_font)
-                y_position += 25
-            
-            y_position += 10
-            
-            # Generar código de barras
-            if product_data.get('barcode'):
-                barcode_result = BarcodeGenerator.generate_barcode_image(
-                    product_data['barcode']
-                )
-                
-                if barcode_result['success']:
-                    # Decodificar imagen de código de barras
-                    barcode_data = barcode_result['image'].split(',')[1]
-                    barcode_img = Image.open(BytesIO(base64.b64decode(barcode_data)))
-                    
-                    # Redimensionar para que quepa en la etiqueta
-                    barcode_width = width - 40
-                    barcode_height = int(barcode_img.height * (barcode_width / barcode_img.width))
-                    barcode_img = barcode_img.resize((barcode_width, barcode_height))
-                    
-                    # Pegar en la etiqueta
-                    img.paste(barcode_img, (20, y_position))
-                    y_position += barcode_height + 15
-            
-            # Agregar código QR si se solicita
-            if include_qr and product_data.get('qr_code'):
-                qr_result = BarcodeGenerator.generate_qr_image(
-                    product_data['qr_code'], 
-                    size=5
-                )
-                
-                if qr_result['success']:
-                    qr_data = qr_result['image'].split(',')[1]
-                    qr_img = Image.open(BytesIO(base64.b64decode(qr_data)))
-                    qr_img = qr_img.resize((120, 120))
-                    img.paste(qr_img, (width - 140, height - 140))
+            png_bytes = BarcodeGenerator.render_product_label(product_data, include_qr, template)
             
             # Convertir a base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.getvalue()).decode()
+            img_base64 = base64.b64encode(png_bytes).decode()
             
             return {
                 'success': True,
@@ -244,13 +308,37 @@ class BarcodeGenerator:
             }
     
     @staticmethod
-    def generate_batch_labels(products_list, include_qr=False):
+    def _render_product_label(product_data, include_qr=False, template=None):
+        """Compone la etiqueta de un producto con su plantilla y retorna la imagen PIL"""
+        label_template = BarcodeGenerator._label_template(include_qr, template)
+        
+        # Generar código de barras
+        barcode_img = None
+        if product_data.get('barcode') and label_template.config.get('show_barcode', True):
+            try:
+                barcode_img = BarcodeGenerator.barcode_pil_image(product_data['barcode'])
+            except Exception:
+                barcode_img = None
+        
+        # Agregar código QR si se solicita
+        qr_img = None
+        if (include_qr or label_template.config.get('show_qr')) and product_data.get('qr_code'):
+            qr_img = BarcodeGenerator.qr_pil_image(product_data['qr_code'], size=5)
+        
+        return label_template.render(product_data, barcode_img, qr_img)
+    
+    @staticmethod
+    def generate_batch_labels(products_list, include_qr=False, workers=None, template=None):
         """
         Genera múltiples etiquetas en un solo documento.
+        Los lotes grandes se reparten por bloques en un pool de procesos;
+        los lotes pequeños se generan en serie.
         
         Args:
             products_list (list): Lista de diccionarios con información de productos
             include_qr (bool): Incluir códigos QR en las etiquetas
+            workers (int): Procesos a usar (por defecto LABEL_POOL_WORKERS)
+            template (str): Plantilla de etiqueta
         
         Returns:
             dict: Resultado con lista de etiquetas o error
@@ -259,9 +347,28 @@ class BarcodeGenerator:
             labels = []
             errors = []
             
-            for product_data in products_list:
-                label = BarcodeGenerator.generate_product_label(product_data, include_qr)
-                
+            products_list = list(products_list)
+            workers = LABEL_POOL_WORKERS if workers is None else workers
+            
+            results = None
+            if workers > 1 and len(products_list) >= LABEL_POOL_MIN_BATCH:
+                chunks = [
+                    products_list[i:i + LABEL_POOL_CHUNK_SIZE]
+                    for i in range(0, len(products_list), LABEL_POOL_CHUNK_SIZE)
+                ]
+                # map conserva el orden de los bloques; None si el pool falló
+                chunk_results = label_pool.map(
+                    _render_label_chunk, chunks,
+                    [include_qr] * len(chunks), [template] * len(chunks),
+                    timeout=LABEL_POOL_TIMEOUT
+                )
+                if chunk_results is not None:
+                    results = [label for chunk_result in chunk_results for label in chunk_result]
+            
+            if results is None:
+                results = _render_label_chunk(products_list, include_qr, template)
+            
+            for product_data, label in zip(products_list, results):
                 if label['success']:
                     labels.append({
                         'product_id': product_data.get('id'),
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from app.utils.background_rebuild import BackgroundRebuilder
+
+
+class CodeExistenceIndex:
+    """
+    Índice en memoria de todos los códigos de barras y SKU de productos,
+    guardados como arreglos ordenados y consultados con bisect.
+
+    Responde "no existe" sin consultar la base de datos; un "existe" se
+    confirma con la base de datos, así que una entrada desactualizada nunca
+    produce un falso positivo. El índice se reconstruye en segundo plano al
+    primer uso y cuando supera ``max_age`` segundos, para recoger los códigos
+    creados por otros procesos (la restricción UNIQUE sigue siendo la
+    garantía final).
+    """
+
+    KINDS = ('barcode', 'sku')
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._codes = {kind: [] for kind in self.KINDS}
+        self._built_at = None
+        # Códigos agregados durante una reconstrucción, para aplicarlos al terminar
+        self._pending = None
+        # Se incrementa al invalidar; una reconstrucción iniciada antes no deja el índice al día
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._rebuilder = BackgroundRebuilder('codigos', self.rebuild)
+        self.probes_avoided = 0
+        self.probes = 0
+
+    def rebuild(self):
+        """
+        Reconstruye el índice con todos los productos (activos o no). La
+        lectura se hace fuera del lock y los arreglos se reemplazan de una vez.
+        """
+        from app.models.product_model import Product
+        from app import db
+
+        with self._lock:
+            self._pending = []
+            generation = self._generation
+
+        try:
+            barcodes = [b for (b,) in db.session.query(Product.barcode).filter(Product.barcode.isnot(None))]
+            skus = [s for (s,) in db.session.query(Product.sku).filter(Product.sku.isnot(None))]
+            barcodes.sort()
+            skus.sort()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._codes = {'barcode': barcodes, 'sku': skus}
+            self._built_at = time.monotonic() if generation == self._generation else None
+            pending, self._pending = self._pending, None
+            for kind, code in pending:
+                self._insert(kind, code)
+
+    def _refresh_if_stale(self):
+        """Lanza la reconstrucción en segundo plano si el índice venció"""
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.max_age:
+            self._rebuilder.request()
+
+    def _insert(self, kind, code):
+        codes = self._codes[kind]
+        position = bisect_left(codes, code)
+        if position == len(codes) or codes[position] != code:
+            insort(codes, code)
+
+    def add(self, barcode=None, sku=None):
+        """Agrega los códigos de un producto recién creado o actualizado"""
+        with self._lock:
+            for kind, code in (('barcode', barcode), ('sku', sku)):
+                if not code:
+                    continue
+                if self._pending is not None:
+                    self._pending.append((kind, code))
+                if self._built_at is not None:
+                    self._insert(kind, code)
+
+    def invalidate(self):
+        """Fuerza la reconstrucción en la próxima consulta (p. ej. tras una importación)"""
+        with self._lock:
+            self._built_at = None
+            self._generation += 1
+
+    def might_exist(self, kind, code):
+        """
+        Indica si ``code`` puede existir. ``False`` es definitivo (según el
+        índice); ``True`` debe confirmarse con la base de datos.
+
+        Si el índice venció se responde con él mientras se reconstruye en
+        segundo plano; si fue invalidado o aún no se construyó, se responde
+        ``True`` para que la base de datos decida.
+
+        Args:
+            kind (str): 'barcode' o 'sku'
+            code (str): Código a verificar
+        """
+        self._refresh_if_stale()
+        with self._lock:
+            if self._built_at is None:
+                self.probes += 1
+                return True
+            codes = self._codes[kind]
+            position = bisect_left(codes, code)
+            found = position < len(codes) and codes[position] == code
+            if found:
+                self.probes += 1
+            else:
+                self.probes_avoided += 1
+            return found
+
+    def stats(self):
+        with self._lock:
+            return {
+                'barcodes': len(self._codes['barcode']),
+                'skus': len(self._codes['sku']),
+                'db_probes': self.probes,
+                'db_probes_avoided': self.probes_avoided,
+                'rebuilding': self._rebuilder.running,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None
+            }
+
+
+# Instancia compartida por proceso
+code_index = CodeExistenceIndex(max_age=int(os.getenv('CODE_INDEX_MAX_AGE', 300)))
@@ -0,0 +1,21 @@
+import base64
+import json
+
+
+def encode_cursor(values):
+    """Codifica los valores de orden del último resultado como cursor opaco"""
+    payload = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica un cursor generado con encode_cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Cursor inválido')
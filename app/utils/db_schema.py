@@ -0,0 +1,112 @@
+from app import db
+from sqlalchemy import text
+from sqlalchemy.schema import CreateColumn
+
+
+def _drop_index(table_name, index_name):
+    preparer = db.engine.dialect.identifier_preparer
+    sql = f'DROP INDEX {preparer.quote(index_name)}'
+    if db.engine.dialect.name == 'mysql':
+        sql += f' ON {preparer.quote(table_name)}'
+    with db.engine.begin() as conn:
+        conn.execute(text(sql))
+
+
+def ensure_indexes(*models):
+    """
+    Crea los índices declarados en los modelos que aún no existen y elimina
+    los que el modelo declara obsoletos (``__obsolete_indexes__``).
+    ``db.create_all()`` no agrega índices nuevos a tablas ya creadas,
+    así que esto cubre los índices añadidos o retirados después de la
+    primera instalación.
+
+    Returns:
+        list: Nombres de los índices creados o eliminados ("-nombre")
+    """
+    created = []
+    existing_by_table = {}
+    inspector = db.inspect(db.engine)
+
+    for model in models:
+        table = model.__table__
+        if table.name not in existing_by_table:
+            existing_by_table[table.name] = {
+                index['name'] for index in inspector.get_indexes(table.name)
+            }
+        for index_name in getattr(model, '__obsolete_indexes__', ()):
+            if index_name in existing_by_table[table.name]:
+                _drop_index(table.name, index_name)
+                existing_by_table[table.name].discard(index_name)
+                created.append(f'-{index_name}')
+        for index in table.indexes:
+            if index.name not in existing_by_table[table.name]:
+                index.create(db.engine)
+                created.append(index.name)
+
+    return created
+
+
+def ensure_columns(*models):
+    """
+    Agrega a tablas existentes las columnas declaradas en los modelos que
+    aún no existen (``db.create_all()`` solo crea tablas nuevas). Las
+    columnas nuevas deben admitir NULL o tener un valor por defecto.
+
+    Returns:
+        list: Columnas agregadas como "tabla.columna"
+    """
+    added = []
+    inspector = db.inspect(db.engine)
+
+    for model in models:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+            added.append(f'{table.name}.{column.name}')
+
+    return added
+
+
+def ensure_not_null(model, *column_names):
+    """
+    Completa con el valor por defecto del modelo los NULL de las columnas
+    indicadas y las declara NOT NULL en tablas ya creadas (``db.create_all()``
+    no modifica columnas existentes). Solo Postgres y MySQL admiten el ALTER;
+    en otros motores únicamente se completan los valores.
+
+    Returns:
+        list: Columnas modificadas como "tabla.columna"
+    """
+    table = model.__table__
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(table.name):
+        return []
+    nullable = {column['name'] for column in inspector.get_columns(table.name) if column['nullable']}
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    changed = []
+
+    for name in column_names:
+        if name not in nullable:
+            continue
+        column = table.columns[name]
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(column.is_(None)).values({name: column.default.arg}))
+            if dialect.name == 'postgresql':
+                conn.execute(text(
+                    f'ALTER TABLE {preparer.format_table(table)} '
+                    f'ALTER COLUMN {preparer.format_column(column)} SET NOT NULL'
+                ))
+            elif dialect.name == 'mysql':
+                ddl = CreateColumn(column).compile(dialect=dialect)
+                conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} MODIFY COLUMN {ddl}'))
+        changed.append(f'{table.name}.{name}')
+
+    return changed
@@ -0,0 +1,118 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+
+class EventBus:
+    """
+    Publicación/suscripción en proceso para eventos de inventario.
+    Cada suscriptor tiene su propia cola acotada; si un cliente lento la
+    llena, sus eventos más nuevos se descartan sin bloquear a quien publica.
+    Se guardan los últimos eventos para reenviarlos a quien se reconecta
+    con ``Last-Event-ID``.
+    """
+
+    def __init__(self, queue_size=500, history_size=200):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def publish(self, event_type, data):
+        """Envía un evento a todos los suscriptores"""
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'data': data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+        return event
+
+    def subscribe(self, last_event_id=None):
+        """
+        Registra un suscriptor y retorna su cola de eventos.
+
+        Args:
+            last_event_id (int): Reenviar los eventos posteriores a este id
+        """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        subscriber.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def format_sse(event):
+        """Formatea un evento como mensaje Server-Sent Events"""
+        payload = json.dumps(event['data'], default=str)
+        return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'history': len(self._history),
+                'dropped': self.dropped
+            }
+
+
+# Instancia compartida por proceso
+inventory_events = EventBus()
+
+
+# Campos del producto que viajan en los eventos de stock
+STOCK_EVENT_FIELDS = ('id', 'barcode', 'name', 'stock', 'min_stock')
+
+
+def publish_stock_change(product, previous_stock, movement_data=None):
+    """
+    Publica el movimiento, el cambio de stock y, si corresponde, el cruce
+    del umbral de stock bajo de un producto.
+    """
+    publish_stock_data(product.to_dict(fields=STOCK_EVENT_FIELDS), previous_stock, movement_data)
+
+
+def publish_stock_data(product_data, previous_stock, movement_data=None):
+    """
+    Igual que publish_stock_change, a partir de ``Product.to_dict()``
+    (al menos STOCK_EVENT_FIELDS) en lugar de la instancia.
+    """
+    if movement_data is not None:
+        inventory_events.publish('movement', movement_data)
+
+    inventory_events.publish('stock', {
+        'product_id': product_data['id'],
+        'barcode': product_data['barcode'],
+        'name': product_data['name'],
+        'previous_stock': previous_stock,
+        'stock': product_data['stock'],
+        'min_stock': product_data['min_stock']
+    })
+
+    min_stock = product_data['min_stock'] or 0
+    was_low = previous_stock < min_stock
+    is_low = product_data['stock'] < min_stock
+    if was_low != is_low:
+        inventory_events.publish('low_stock', {
+            'product_id': product_data['id'],
+            'barcode': product_data['barcode'],
+            'name': product_data['name'],
+            'stock': product_data['stock'],
+            'min_stock': product_data['min_stock'],
+            'low_stock': is_low
+        })
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ImageRenderCache:
+    """
+    Caché direccionada por contenido para imágenes renderizadas (PNG de códigos
+    de barras, QR y etiquetas). La clave es un hash de los parámetros de
+    renderizado, por lo que la misma entrada siempre produce la misma imagen.
+
+    Tiene un nivel en memoria (LRU limitado por bytes) y un nivel opcional en
+    disco con expulsión por tamaño total.
+    """
+
+    def __init__(self, max_memory_bytes=32 * 1024 * 1024, disk_dir=None,
+                 max_disk_bytes=256 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(*parts):
+        """Genera la clave de caché a partir de los parámetros de renderizado"""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Obtiene los bytes de una imagen en caché.
+
+        Returns:
+            bytes | None: Imagen en caché o None si no existe
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, data)
+        return data
+
+    def set(self, key, data):
+        """Guarda los bytes de una imagen en ambos niveles de caché"""
+        with self._lock:
+            self._store_memory(key, data)
+        self._write_disk(key, data)
+
+    def get_or_render(self, key, render):
+        """
+        Retorna la imagen en caché o la genera con ``render()`` y la guarda.
+
+        Args:
+            key (str): Clave generada con make_key
+            render (callable): Función sin argumentos que retorna los bytes
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.set(key, data)
+        return data
+
+    def clear(self):
+        """Vacía el nivel en memoria (el nivel en disco se conserva)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def stats(self):
+        """Retorna estadísticas de aciertos y ocupación"""
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'disk_enabled': bool(self.disk_dir),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / total, 4) if total else 0.0
+            }
+
+    # ------------------------------------------
+    # Nivel en memoria (requiere self._lock)
+    # ------------------------------------------
+
+    def _store_memory(self, key, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # ------------------------------------------
+    # Nivel en disco
+    # ------------------------------------------
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f'{key}.bin')
+
+    def _disk_entries(self):
+        """Lista (ruta, tamaño, mtime) de los archivos guardados en disco"""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Marcar como usado recientemente para la expulsión
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.disk_dir or len(data) > self.max_disk_bytes:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Elimina los archivos menos usados hasta quedar bajo el límite"""
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+
+# Instancia compartida por proceso
+image_cache = ImageRenderCache(
+    max_memory_bytes=int(os.getenv('BARCODE_IMAGE_CACHE_MEMORY_BYTES', 32 * 1024 * 1024)),
+    disk_dir=os.getenv('BARCODE_IMAGE_CACHE_DIR') or None,
+    max_disk_bytes=int(os.getenv('BARCODE_IMAGE_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+)
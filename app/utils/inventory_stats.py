@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryStatsAggregate:
+    """
+    Totales de inventario del módulo de códigos de barras mantenidos en
+    memoria: productos activos, con stock bajo, sin stock y valor total
+    (stock * costo). Se guarda el aporte de cada producto activo, así que
+    ``track`` ajusta los totales restando el aporte anterior y sumando el
+    nuevo, y ``snapshot`` responde sin consultar la base de datos.
+
+    Los cambios hechos por otros procesos no se ven hasta la siguiente
+    reconciliación, que recalcula los totales desde la base de datos y
+    registra la diferencia encontrada.
+    """
+
+    def __init__(self):
+        self._contributions = {}
+        self._totals = self._empty_totals()
+        self._built_at = None
+        self._reconciled_at = None
+        self._last_drift = None
+        self._lock = threading.RLock()
+        self._reconciler = None
+
+    @staticmethod
+    def _empty_totals():
+        return {
+            'total_products': 0,
+            'low_stock_products': 0,
+            'out_of_stock': 0,
+            'total_inventory_value': 0.0
+        }
+
+    @staticmethod
+    def _apply(totals, contribution, sign):
+        stock, cost, min_stock = contribution
+        totals['total_products'] += sign
+        if stock < (min_stock or 0):
+            totals['low_stock_products'] += sign
+        if stock == 0:
+            totals['out_of_stock'] += sign
+        totals['total_inventory_value'] += sign * stock * (cost or 0.0)
+
+    # ------------------------------------------
+    # Construcción y reconciliación
+    # ------------------------------------------
+
+    def _load(self):
+        from app.models.product_model import Product
+        from app import db
+
+        rows = db.session.query(Product.id, Product.stock, Product.cost, Product.min_stock)\
+            .filter(Product.active == True)\
+            .all()
+
+        contributions = {}
+        totals = self._empty_totals()
+        for product_id, stock, cost, min_stock in rows:
+            contribution = (stock or 0, cost or 0.0, min_stock)
+            contributions[product_id] = contribution
+            self._apply(totals, contribution, 1)
+        return contributions, totals
+
+    def rebuild(self):
+        """Recalcula los totales desde la base de datos"""
+        contributions, totals = self._load()
+        with self._lock:
+            self._contributions = contributions
+            self._totals = totals
+            self._built_at = time.monotonic()
+
+    def reconcile(self):
+        """
+        Recalcula los totales desde la base de datos, los reemplaza y
+        registra la diferencia con los totales incrementales.
+
+        Returns:
+            dict: Diferencia por total (recalculado - incremental)
+        """
+        contributions, totals = self._load()
+        with self._lock:
+            if self._built_at is None:
+                drift = {}
+            else:
+                drift = {
+                    key: round(totals[key] - self._totals[key], 2)
+                    for key in totals
+                    if round(totals[key] - self._totals[key], 2) != 0
+                }
+            self._contributions = contributions
+            self._totals = totals
+            self._built_at = self._reconciled_at = time.monotonic()
+            self._last_drift = drift
+
+        if drift:
+            logger.warning('Estadísticas de inventario desfasadas, corregidas: %s', drift)
+        return drift
+
+    def start_reconciler(self, app, interval):
+        """Inicia un hilo que reconcilia los totales cada ``interval`` segundos"""
+        if interval <= 0 or self._reconciler is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        self.reconcile()
+                except Exception:
+                    logger.exception('Error al reconciliar estadísticas de inventario')
+
+        self._reconciler = threading.Thread(target=run, name='inventory-stats-reconciler', daemon=True)
+        self._reconciler.start()
+
+    # ------------------------------------------
+    # Actualización
+    # ------------------------------------------
+
+    def track(self, product):
+        """Actualiza el aporte de un producto tras confirmar un cambio"""
+        self.track_values(product.id, product.active, product.stock, product.cost, product.min_stock)
+
+    def track_values(self, product_id, active, stock, cost, min_stock):
+        """
+        Igual que track, con valores ya leídos (p. ej. capturados antes del
+        commit, para no recargar productos expirados)
+        """
+        with self._lock:
+            if self._built_at is None:
+                return
+            previous = self._contributions.pop(product_id, None)
+            if previous is not None:
+                self._apply(self._totals, previous, -1)
+            if active:
+                contribution = (stock or 0, cost or 0.0, min_stock)
+                self._contributions[product_id] = contribution
+                self._apply(self._totals, contribution, 1)
+
+    def invalidate(self):
+        """Fuerza el recálculo en la próxima consulta (p. ej. tras una importación)"""
+        with self._lock:
+            self._built_at = None
+
+    # ------------------------------------------
+    # Consulta
+    # ------------------------------------------
+
+    def snapshot(self):
+        """Retorna los totales actuales"""
+        with self._lock:
+            if self._built_at is None:
+                self.rebuild()
+            totals = dict(self._totals)
+        totals['total_inventory_value'] = round(totals['total_inventory_value'], 2)
+        return totals
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._contributions),
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None,
+                'reconciled_seconds_ago': round(time.monotonic() - self._reconciled_at, 1) if self._reconciled_at else None,
+                'last_drift': self._last_drift
+            }
+
+
+# Instancia compartida por proceso
+inventory_stats = InventoryStatsAggregate()
+
+INVENTORY_STATS_RECONCILE_INTERVAL = int(os.getenv('INVENTORY_STATS_RECONCILE_INTERVAL', 300))
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Plantillas predefinidas. Se pueden modificar o ampliar sin tocar código
+# con un archivo JSON indicado en LABEL_TEMPLATES_FILE, por ejemplo:
+#   {"price_tag": {"price_size": 60}, "mini": {"width": 300, "height": 200}}
+DEFAULT_TEMPLATES = {
+    'barcode': {
+        'width': 500,
+        'height': 350,
+        'font': 'arial.ttf',
+        'title_size': 22,
+        'text_size': 16,
+        'title_max_chars': 40,
+        'fields': ['sku', 'category', 'price'],
+        'price_size': 0,
+        'show_barcode': True,
+        'show_qr': False,
+        'qr_size': 120,
+    },
+    'barcode_qr': {
+        'height': 400,
+        'show_qr': True,
+    },
+    'price_tag': {
+        'width': 400,
+        'height': 300,
+        'title_size': 20,
+        'fields': ['sku'],
+        'price_size': 48,
+    },
+}
+
+# Formato de cada campo informativo de la etiqueta
+FIELD_FORMATS = {
+    'sku': lambda v: f"SKU: {v}",
+    'category': lambda v: f"Categoría: {v}",
+    'price': lambda v: f"Precio: ${v:,.2f}",
+    'supplier': lambda v: f"Proveedor: {v}",
+    'barcode': lambda v: f"Código: {v}",
+}
+
+
+@lru_cache(maxsize=32)
+def load_font(path, size):
+    """Carga una fuente una sola vez por proceso (con fallback a la de PIL)"""
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+class LabelTemplate:
+    """
+    Plantilla de etiqueta precompilada. Las fuentes se cargan una vez y el
+    fondo con la línea divisoria se dibuja una sola vez; cada producto solo
+    agrega su texto y las imágenes de los códigos.
+    """
+
+    # Versión del diseño dibujado por render(); se incrementa al cambiarlo
+    # para invalidar imágenes en caché y ETags
+    LAYOUT_VERSION = 1
+
+    # Posiciones fijas del diseño
+    MARGIN = 15
+    TITLE_HEIGHT = 35
+    LINE_HEIGHT = 25
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.width = int(config['width'])
+        self.height = int(config['height'])
+        self.fields = [f for f in config.get('fields', []) if f in FIELD_FORMATS]
+
+        self.title_font = load_font(config['font'], int(config['title_size']))
+        self.text_font = load_font(config['font'], int(config['text_size']))
+        self.price_font = (
+            load_font(config['font'], int(config['price_size']))
+            if config.get('price_size') else None
+        )
+
+        self.separator_y = self.MARGIN + self.TITLE_HEIGHT
+        self._base = self._render_static_layer()
+
+    def _render_static_layer(self):
+        """Dibuja las partes comunes a todas las etiquetas"""
+        img = Image.new('RGB', (self.width, self.height), 'white')
+        draw = ImageDraw.Draw(img)
+        draw.line(
+            [(self.MARGIN, self.separator_y), (self.width - self.MARGIN, self.separator_y)],
+            fill='#cccccc', width=2
+        )
+        return img
+
+    def cache_key_parts(self):
+        """Parámetros de la plantilla que afectan a la imagen generada"""
+        return [self.name, self.LAYOUT_VERSION, sorted(self.config.items())]
+
+    def render(self, product_data, barcode_img=None, qr_img=None):
+        """
+        Compone la etiqueta de un producto sobre la capa estática.
+
+        Args:
+            product_data (dict): Información del producto
+            barcode_img (PIL.Image): Código de barras ya renderizado
+            qr_img (PIL.Image): Código QR ya renderizado
+
+        Returns:
+            PIL.Image: Etiqueta compuesta
+        """
+        img = self._base.copy()
+        draw = ImageDraw.Draw(img)
+
+        # Título del producto
+        max_chars = int(self.config.get('title_max_chars', 40))
+        product_name = (product_data.get('name') or 'Producto')[:max_chars]
+        draw.text((self.MARGIN, self.MARGIN), product_name, fill='black', font=self.title_font)
+        y_position = self.separator_y + self.MARGIN
+
+        # Precio destacado (etiqueta de precio)
+        if self.price_font is not None and product_data.get('price'):
+            draw.text(
+                (self.MARGIN, y_position), f"${product_data['price']:,.2f}",
+                fill='black', font=self.price_font
+            )
+            y_position += int(self.config['price_size']) + 10
+
+        # Información adicional
+        for field in self.fields:
+            value = product_data.get(field)
+            if value:
+                draw.text((self.MARGIN, y_position), FIELD_FORMATS[field](value),
+                          fill='black', font=self.text_font)
+                y_position += self.LINE_HEIGHT
+
+        y_position += 10
+
+        qr_size = int(self.config.get('qr_size', 120))
+
+        # Código de barras escalado al ancho disponible
+        if barcode_img is not None and self.config.get('show_barcode', True):
+            barcode_width = self.width - 40
+            barcode_height = int(barcode_img.height * (barcode_width / barcode_img.width))
+            max_height = self.height - y_position - 5
+            if barcode_height > max_height > 0:
+                barcode_width = int(barcode_width * max_height / barcode_height)
+                barcode_height = max_height
+            if barcode_height > 0:
+                img.paste(barcode_img.resize((barcode_width, barcode_height)), (20, y_position))
+
+        # Código QR en la esquina inferior derecha
+        if qr_img is not None:
+            qr_img = qr_img.resize((qr_size, qr_size))
+            img.paste(qr_img, (self.width - qr_size - 20, self.height - qr_size - 20))
+
+        return img
+
+
+_templates = None
+_templates_lock = threading.Lock()
+
+
+def _load_templates():
+    configs = {}
+    base = DEFAULT_TEMPLATES['barcode']
+    for name, overrides in DEFAULT_TEMPLATES.items():
+        configs[name] = {**base, **overrides}
+
+    templates_file = os.getenv('LABEL_TEMPLATES_FILE')
+    if templates_file and os.path.exists(templates_file):
+        with open(templates_file, encoding='utf-8') as f:
+            for name, overrides in json.load(f).items():
+                configs[name] = {**configs.get(name, base), **overrides}
+
+    return {name: LabelTemplate(name, config) for name, config in configs.items()}
+
+
+def get_label_template(name):
+    """
+    Retorna la plantilla precompilada ``name`` (se construyen una vez por proceso).
+
+    Raises:
+        ValueError: Si la plantilla no existe
+    """
+    global _templates
+    with _templates_lock:
+        if _templates is None:
+            _templates = _load_templates()
+        templates = _templates
+
+    if name not in templates:
+        raise ValueError(f'Plantilla de etiqueta no encontrada: {name}')
+    return templates[name]
+
+
+def list_label_templates():
+    """Retorna los nombres y configuración de las plantillas disponibles"""
+    get_label_template('barcode')
+    return {name: template.config for name, template in _templates.items()}
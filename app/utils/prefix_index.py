@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from app.utils.text import normalize_text
+from app.utils.background_rebuild import BackgroundRebuilder
+
+
+class ProductPrefixIndex:
+    """
+    Índice en memoria para autocompletar por prefijo de código de barras,
+    SKU y nombre normalizado. Guarda un arreglo ordenado de (clave, id) y
+    busca con bisect, por lo que cada consulta es O(log n + resultados).
+
+    La memoria se acota limitando la cantidad de productos, el largo de las
+    claves y las palabras indexadas por nombre. El índice se reconstruye
+    desde la base de datos en segundo plano al primer uso y cuando supera
+    ``max_age`` segundos, para recoger cambios hechos por otros procesos.
+    """
+
+    KEY_LENGTH = 40
+    WORDS_PER_NAME = 8
+
+    def __init__(self, max_products=200000, max_age=600):
+        self.max_products = max_products
+        self.max_age = max_age
+        self._entries = []
+        self._records = {}
+        self._built_at = None
+        self._complete = False
+        # Cambios recibidos durante una reconstrucción, para aplicarlos al terminar
+        self._pending = None
+        # Se incrementa al invalidar; una reconstrucción iniciada antes no deja el índice al día
+        self._generation = 0
+        self._lock = threading.RLock()
+        self._rebuilder = BackgroundRebuilder('prefijos', self.rebuild)
+
+    # ------------------------------------------
+    # Construcción
+    # ------------------------------------------
+
+    def _keys_for(self, barcode, sku, name):
+        keys = set()
+        if barcode:
+            keys.add(('b', normalize_text(barcode)[:self.KEY_LENGTH]))
+        if sku:
+            keys.add(('s', normalize_text(sku)[:self.KEY_LENGTH]))
+        normalized = normalize_text(name)
+        if normalized:
+            # Cada palabra del nombre puede iniciar la búsqueda
+            words = normalized.split(' ')
+            position = 0
+            for word in words[:self.WORDS_PER_NAME]:
+                keys.add(('n', normalized[position:position + self.KEY_LENGTH]))
+                position += len(word) + 1
+        return keys
+
+    def _record(self, product_id, barcode, sku, name):
+        return {
+            'id': product_id,
+            'barcode': barcode,
+            'sku': sku,
+            'name': name,
+            'keys': self._keys_for(barcode, sku, name)
+        }
+
+    def _remove(self, product_id):
+        record = self._records.pop(product_id, None)
+        if record is None:
+            return
+        for kind, key in record['keys']:
+            entry = (key, product_id, kind)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def rebuild(self):
+        """
+        Reconstruye el índice con los productos activos. La lectura y el
+        ordenamiento se hacen fuera del lock; el índice nuevo se reemplaza
+        de una vez, así que las búsquedas concurrentes no esperan.
+        """
+        from app.models.product_model import Product
+        from app import db
+
+        with self._lock:
+            self._pending = []
+            generation = self._generation
+
+        try:
+            rows = db.session.query(Product.id, Product.barcode, Product.sku, Product.name)\
+                .filter(Product.active == True)\
+                .order_by(Product.id)\
+                .limit(self.max_products + 1)\
+                .all()
+
+            complete = len(rows) <= self.max_products
+            records = {}
+            entries = []
+            for product_id, barcode, sku, name in rows[:self.max_products]:
+                record = self._record(product_id, barcode, sku, name)
+                records[product_id] = record
+                entries.extend((key, product_id, kind) for kind, key in record['keys'])
+            entries.sort()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._records = records
+            self._entries = entries
+            self._complete = complete
+            self._built_at = time.monotonic() if generation == self._generation else None
+            pending, self._pending = self._pending, None
+            for values in pending:
+                self._upsert(*values)
+
+    def _refresh_if_stale(self):
+        """Lanza la reconstrucción en segundo plano si el índice venció"""
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at > self.max_age:
+            self._rebuilder.request()
+
+    # ------------------------------------------
+    # Actualización
+    # ------------------------------------------
+
+    def _upsert(self, product_id, active, barcode, sku, name):
+        self._remove(product_id)
+        if not active:
+            return
+        if len(self._records) >= self.max_products:
+            self._complete = False
+            return
+        record = self._record(product_id, barcode, sku, name)
+        self._records[product_id] = record
+        for kind, key in record['keys']:
+            insort(self._entries, (key, product_id, kind))
+
+    def upsert(self, product):
+        """Agrega o actualiza un producto (o lo quita si quedó inactivo)"""
+        values = (product.id, product.active, product.barcode, product.sku, product.name)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(values)
+            if self._built_at is None:
+                return
+            self._upsert(*values)
+
+    def invalidate(self):
+        """Fuerza la reconstrucción en la próxima consulta (p. ej. tras una importación)"""
+        with self._lock:
+            self._built_at = None
+            self._generation += 1
+
+    # ------------------------------------------
+    # Consulta
+    # ------------------------------------------
+
+    def search(self, prefix, limit=10):
+        """
+        Busca productos cuyo código, SKU o nombre empiece por ``prefix``.
+        Si el índice venció se sigue respondiendo con él mientras se
+        reconstruye; si fue invalidado se informa como incompleto.
+
+        Returns:
+            tuple: (lista de sugerencias, True si el índice cubre todo el catálogo)
+        """
+        prefix = normalize_text(prefix)[:self.KEY_LENGTH]
+        if not prefix:
+            return [], True
+
+        self._refresh_if_stale()
+        with self._lock:
+            results = []
+            seen = set()
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(results) < limit:
+                key, product_id, kind = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if product_id not in seen:
+                    seen.add(product_id)
+                    record = self._records[product_id]
+                    results.append({
+                        'id': product_id,
+                        'barcode': record['barcode'],
+                        'sku': record['sku'],
+                        'name': record['name'],
+                        'match': {'b': 'barcode', 's': 'sku', 'n': 'name'}[kind]
+                    })
+                position += 1
+            return results, self._complete and self._built_at is not None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._records),
+                'entries': len(self._entries),
+                'max_products': self.max_products,
+                'complete': self._complete,
+                'rebuilding': self._rebuilder.running,
+                'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None
+            }
+
+
+# Instancia compartida por proceso
+product_prefix_index = ProductPrefixIndex(
+    max_products=int(os.getenv('PRODUCT_PREFIX_INDEX_MAX', 200000)),
+    max_age=int(os.getenv('PRODUCT_PREFIX_INDEX_MAX_AGE', 600))
+)
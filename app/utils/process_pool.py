@@ -0,0 +1,68 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+logger = logging.getLogger(__name__)
+
+
+class SharedProcessPool:
+    """
+    Pool de procesos compartido por el proceso del servidor, creado al
+    primer uso.
+
+    Los procesos hijos se inician con ``spawn``: el servidor es multihilo y
+    con ``fork`` un hijo puede heredar locks tomados por otro hilo (cachés,
+    índices en memoria, logging) y quedar bloqueado. Cada llamada a ``map``
+    tiene un tiempo límite; si se agota o el pool se rompe, el pool se
+    descarta y el llamador recibe None para procesar en el propio proceso.
+    """
+
+    def __init__(self, name, max_workers, start_method='spawn'):
+        self.name = name
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._pool
+
+    def reset(self):
+        """Descarta el pool actual y termina sus procesos (p. ej. uno colgado)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def map(self, fn, *iterables, timeout=None):
+        """
+        Ejecuta ``fn`` sobre los elementos en el pool, conservando el orden.
+
+        Args:
+            fn: Función de nivel de módulo (debe poder serializarse)
+            timeout (float): Segundos máximos para obtener todos los resultados
+
+        Returns:
+            list | None: Resultados, o None si hay que procesar en el propio proceso
+        """
+        try:
+            return list(self._get().map(fn, *iterables, timeout=timeout))
+        except (FuturesTimeoutError, BrokenProcessPool) as e:
+            logger.warning('Pool %s descartado (%s); se procesa en el proceso actual',
+                           self.name, type(e).__name__)
+            self.reset()
+            return None
@@ -0,0 +1,111 @@
+import csv
+import io
+import math
+import os
+
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def iter_table_rows(file_storage):
+    """
+    Lee un archivo CSV o XLSX subido y retorna sus filas una a una.
+    La primera fila se toma como encabezado (en minúsculas y con "_" en
+    lugar de espacios). El archivo nunca se carga completo en memoria.
+
+    Args:
+        file_storage: Archivo subido (werkzeug FileStorage)
+
+    Yields:
+        tuple: (número de fila en el archivo, dict encabezado -> valor)
+
+    Raises:
+        ValueError: Si la extensión no está soportada
+    """
+    extension = os.path.splitext(file_storage.filename or '')[1].lower()
+
+    if extension == '.csv':
+        stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+        sample = stream.read(4096)
+        stream.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(stream, dialect)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield row_number, dict(zip(headers, values))
+
+    elif extension == '.xlsx':
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError('Se requiere openpyxl para importar archivos XLSX')
+
+        workbook = load_workbook(file_storage.stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_normalize_header(h) for h in next(rows, ())]
+            for row_number, values in enumerate(rows, start=2):
+                if any(v not in (None, '') for v in values):
+                    yield row_number, {
+                        h: ('' if v is None else v) for h, v in zip(headers, values)
+                    }
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(
+            f'Formato no soportado. Use: {", ".join(SUPPORTED_EXTENSIONS)}'
+        )
+
+
+def iter_chunks(iterable, size):
+    """Agrupa un iterable en listas de hasta ``size`` elementos"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_number(value):
+    """
+    Convierte una celda en float finito.
+
+    Raises:
+        ValueError: Si el valor no es numérico, es infinito o NaN
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'Valor numérico inválido: {value}')
+    if not math.isfinite(number):
+        raise ValueError(f'Valor numérico inválido: {value}')
+    return number
+
+
+def parse_integer(value):
+    """
+    Convierte una celda en entero. Acepta ``5`` o ``5.0`` (como lo guarda
+    Excel) pero rechaza decimales, infinitos y NaN.
+
+    Raises:
+        ValueError: Si el valor no es un entero válido
+    """
+    number = parse_number(value)
+    if not number.is_integer():
+        raise ValueError(f'Se esperaba un número entero: {value}')
+    try:
+        return int(number)
+    except OverflowError:
+        raise ValueError(f'Valor numérico inválido: {value}')
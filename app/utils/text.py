@@ -0,0 +1,13 @@
+import unicodedata
+
+
+def normalize_text(value):
+    """Minúsculas, sin tildes y con espacios simples"""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(value.lower().split())
+
+
+def escape_like(value, escape='\\'):
+    """Escapa los comodines de LIKE (``%`` y ``_``) y el propio carácter de escape"""
+    return value.replace(escape, escape * 2).replace('%', escape + '%').replace('_', escape + '_')
@@ -2,10 +2,13 @@
 import os
 from app import create_app, db
 
-# Crear la aplicación
-app = create_app()
-
 if __name__ == '__main__':
+    # La aplicación se crea solo aquí: los procesos de los pools de etiquetas
+    # y decodificación (spawn) reimportan este módulo como __mp_main__ y no
+    # deben repetir el arranque (DDL, backfills, hilos en segundo plano).
+    # Para servidores WSGI o ``flask run`` usar wsgi.py.
+    app = create_app()
+    
     # Información de debug
     env = os.getenv('FLASK_ENV', 'development')
     port = int(os.getenv('PORT', 5000))
@@ -0,0 +1,108 @@
+import pytest
+from flask import Flask
+from sqlalchemy import func
+
+from app import db
+from app.models.inventario_model import Producto, MovimientoInventario, CapaCosto, SaldoValorizado
+from app.services import valoracion
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def producto(app):
+    producto = Producto(codigo='P-001', nombre='Tornillo', costo_unitario=5, cantidad=0)
+    db.session.add(producto)
+    db.session.commit()
+    return producto
+
+
+def _mover(producto, cantidad_nueva, tipo, costo=None):
+    movimiento = MovimientoInventario(
+        producto_id=producto.id,
+        tipo=tipo,
+        cantidad=abs(cantidad_nueva - producto.cantidad),
+        cantidad_anterior=producto.cantidad,
+        cantidad_nueva=cantidad_nueva,
+        usuario='test'
+    )
+    producto.cantidad = cantidad_nueva
+    db.session.add(movimiento)
+    valoracion.registrar_movimiento(movimiento, costo)
+    db.session.commit()
+    return movimiento
+
+
+def _unidades_en_capas(producto):
+    return db.session.query(func.coalesce(func.sum(CapaCosto.cantidad_restante), 0))\
+        .filter(CapaCosto.producto_id == producto.id).scalar()
+
+
+def test_salida_sin_stock_queda_como_faltante(producto):
+    _mover(producto, 10, 'entrada', 5)
+    _mover(producto, -5, 'salida')
+
+    saldo = db.session.get(SaldoValorizado, producto.id)
+    assert saldo.cantidad == -5
+    assert _unidades_en_capas(producto) == 0
+    assert saldo.valor_fifo == pytest.approx(0)
+    assert saldo.valor_promedio == pytest.approx(0)
+    # 10 unidades de la capa a 5 y 5 faltantes al costo promedio (5)
+    assert saldo.costo_ventas_fifo == pytest.approx(75)
+    assert saldo.costo_ventas_promedio == pytest.approx(75)
+    assert saldo.valor_faltante == pytest.approx(25)
+
+
+def test_entrada_cubre_primero_el_faltante(producto):
+    _mover(producto, 10, 'entrada', 5)
+    _mover(producto, -5, 'salida')
+    _mover(producto, 3, 'entrada', 7)
+
+    saldo = db.session.get(SaldoValorizado, producto.id)
+    capas = CapaCosto.query.filter(CapaCosto.producto_id == producto.id,
+                                   CapaCosto.cantidad_restante > 0).all()
+    assert saldo.cantidad == 3
+    assert [(c.cantidad_restante, c.costo_unitario) for c in capas] == [(3, 7)]
+    assert saldo.valor_fifo == pytest.approx(21)
+    assert saldo.valor_promedio == pytest.approx(21)
+    # Las 5 unidades faltantes se reajustan de 5 a 7 cada una
+    assert saldo.costo_ventas_fifo == pytest.approx(85)
+    assert saldo.costo_ventas_promedio == pytest.approx(85)
+    assert saldo.valor_faltante == pytest.approx(0)
+
+    fifo = valoracion.reporte_valoracion('fifo')
+    promedio = valoracion.reporte_valoracion('promedio')
+    assert fifo['valor_total'] == promedio['valor_total'] == pytest.approx(21)
+
+
+def test_faltante_cubierto_en_varias_entradas(producto):
+    _mover(producto, 10, 'entrada', 5)
+    _mover(producto, -5, 'salida')
+    _mover(producto, -3, 'entrada', 7)
+
+    saldo = db.session.get(SaldoValorizado, producto.id)
+    assert saldo.cantidad == -3
+    assert _unidades_en_capas(producto) == 0
+    assert saldo.valor_faltante == pytest.approx(15)
+    assert saldo.costo_ventas_fifo == pytest.approx(79)
+
+    _mover(producto, 2, 'entrada', 6)
+
+    saldo = db.session.get(SaldoValorizado, producto.id)
+    assert saldo.cantidad == 2
+    assert _unidades_en_capas(producto) == 2
+    assert saldo.valor_fifo == pytest.approx(12)
+    assert saldo.valor_promedio == pytest.approx(12)
+    assert saldo.costo_ventas_fifo == pytest.approx(82)
+    assert saldo.costo_ventas_promedio == pytest.approx(82)
+    assert saldo.valor_faltante == pytest.approx(0)
@@ -0,0 +1,7 @@
+# wsgi.py
+# Punto de entrada para servidores WSGI y ``flask run`` (FLASK_APP=wsgi.py).
+# run.py crea la aplicación solo al ejecutarse directamente, porque los pools
+# de procesos (spawn) reimportan el módulo principal en cada proceso hijo.
+from app import create_app
+
+app = create_app()